@@ -0,0 +1,38 @@
+# Time and work budgets for a trial
+#
+# Engines check their budget from inside their sweep loops and stop early, handing back whatever
+# they had swept so far, rather than being interrupted by a signal. So a trial can be limited
+# from any thread or process, not just the main thread of the main process.
+#
+# Work is counted in the engine's own steps: a frontier layer for the layer-at-a-time engines,
+# a reveal for the serial one.
+
+from time import monotonic
+
+class Budget:
+    def __init__(self, seconds: float = None, steps: int = None) -> None:
+
+        # When time runs out, on the monotonic clock
+        self.deadline = None if seconds is None else monotonic() + seconds
+
+        # How many more steps may be taken
+        self.steps = steps
+
+        # Whether an engine stopped short because the budget ran out
+        self.expired = False
+
+
+    # Whether the budget has run out
+    def spent(self) -> bool:
+        return (self.steps is not None and self.steps <= 0) or (self.deadline is not None and monotonic() >= self.deadline)
+
+    # Counts steps taken
+    def take(self, steps: int = 1) -> None:
+        if self.steps is not None:
+            self.steps -= steps
+
+
+    # The steps left and deadline as plain numbers, for compiled loops that can't hold a Budget.
+    # -1 and 0 mean no limit, as sweep takes them
+    def limits(self) -> tuple[int, float]:
+        return -1 if self.steps is None else max(self.steps, 0), 0.0 if self.deadline is None else self.deadline
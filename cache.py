@@ -0,0 +1,100 @@
+# A cache of trial results on disk, so a trial that's already been run is never swept again.
+#
+# Trials are keyed by everything that decides how they come out: the engine and its options,
+# the density, safe radius, cutoff and the trial's seed. So only seeded trials can be cached,
+# and only those that ran to the end; a trial that ran out of budget depends on the machine.
+#
+# Kept in an sqlite file, so it lasts between runs. Once it grows past its size, the least
+# recently used trials are evicted.
+
+import os
+import pickle
+import sqlite3
+from time import time_ns
+
+class Cache:
+    def __init__(self, path: str = 'Results/cache.db', size: int = 1 << 30) -> None:
+
+        # Ensures the directory exists
+        if os.path.dirname(path) and not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        # WAL, so a commit after every trial doesn't wait on the disk.
+        # Several processes can share the file, each with a Cache of its own
+        self.path = path
+        self.db = sqlite3.connect(path, timeout = 60)
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = NORMAL')
+
+        self.db.execute('CREATE TABLE IF NOT EXISTS trials (key TEXT PRIMARY KEY, result BLOB, bytes INTEGER, used INTEGER)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS trials_used ON trials (used)')
+        self.db.commit()
+
+        # Most bytes of results to keep, and how many are kept now.
+        # Other processes may be adding to the file too, so this is only as of the last look
+        self.size = size
+        self.bytes = self.used()
+
+        self.hits = 0
+        self.misses = 0
+
+
+    # The key of a trial
+    @staticmethod
+    def key(engine: str, rho: float, r: int, cutoff: int, seed: int) -> str:
+        return repr((engine, float(rho), int(r), float(cutoff), int(seed)))
+
+
+    # A trial's results, or None if it isn't cached
+    def get(self, key: str):
+
+        row = self.db.execute('SELECT result FROM trials WHERE key = ?', (key,)).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.db.execute('UPDATE trials SET used = ? WHERE key = ?', (time_ns(), key))
+        self.db.commit()
+
+        return pickle.loads(row[0])
+
+    # Caches a trial's results, then evicts old trials if there are too many
+    def put(self, key: str, result) -> None:
+
+        blob = pickle.dumps(result, protocol = pickle.HIGHEST_PROTOCOL)
+
+        self.db.execute('INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?)', (key, blob, len(blob), time_ns()))
+        self.evict()
+        self.db.commit()
+
+    # Drops the least recently used trials until the cache fits its size.
+    # Counts what's kept afresh first, as other processes' trials count against the size too
+    def evict(self) -> None:
+
+        self.bytes = self.used()
+
+        while self.bytes > self.size:
+
+            oldest = self.db.execute('SELECT key, bytes FROM trials ORDER BY used LIMIT 64').fetchall()
+            if not oldest:
+                break
+
+            for key, size in oldest:
+                self.db.execute('DELETE FROM trials WHERE key = ?', (key,))
+                self.bytes -= size
+
+                if self.bytes <= self.size:
+                    break
+
+
+    # How many bytes of results are kept, by every process
+    def used(self) -> int:
+        return self.db.execute('SELECT COALESCE(SUM(bytes), 0) FROM trials').fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.db.execute('SELECT COUNT(*) FROM trials').fetchone()[0]
+
+    def close(self) -> None:
+        self.db.close()
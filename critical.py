@@ -1,8 +1,12 @@
 # Runs experiments to find the critical density
 
-from experiment import Experiment
+from experiment import Experiment, worker
+from engines import ENGINES
+from minefield import threshold
+from cache import Cache
 
 from time import time
+from concurrent.futures import ProcessPoolExecutor
 
 from logger import log
 
@@ -114,8 +118,67 @@ def alpha_step(self, meta: dict) -> tuple[float]:
 
 
 
+# Shrinks the bracket on the critical density from a round of experiments at densities inside it.
+# Below the critical density trials go infinite and above it they die out, so the new bracket is
+# between the neighbouring densities where that switches. Near the critical density experiments
+# are noisy and may not switch just once, so the switch is put wherever misplaces the fewest.
+# Where every experiment is on one side and that end of the bracket was only a guess, the bracket
+# reaches out past it by its own width.
+# Returns the new bracket, and whether each end is known to be on its side
+def k_section(self, rhos: list[float], metas: list[dict]) -> tuple:
+
+    low, high = self.bracket
+    sure_low, sure_high = self.sure
+    width = high - low
+
+    infinite = [infinite_side(meta) for meta in metas]
+
+    # How many experiments a switch before rhos[s] would misplace
+    costs = [sum(not inf for inf in infinite[: s]) + sum(infinite[s :]) for s in range(len(rhos) + 1)]
+    s = costs.index(min(costs))
+
+    if s > 0:
+        low, sure_low = rhos[s - 1], True
+    elif not sure_low:
+        low = max(0, low - width)
+        sure_low = low == 0
+
+    if s < len(rhos):
+        high, sure_high = rhos[s], True
+    elif not sure_high:
+        high = min(1, high + width)
+        sure_high = high == 1
+
+    return low, high, sure_low, sure_high
+
+# Whether an experiment was below the critical density, where trials go infinite.
+# A sequential experiment says which side it stopped on; otherwise any trial reaching the cutoff
+def infinite_side(meta: dict) -> bool:
+    if meta['stop'] in ('above', 'below'):
+        return meta['stop'] == 'above'
+    return bool(meta['infinite'])
+
+
+# Runs an experiment, so a round of them can be spread over a pool of processes.
+# A cache can't be sent to another process, so is opened again there from its path and size.
+# Returns the experiment's results, how long it took and its printout
+def run(args: tuple, kwargs: dict, cache: tuple = None) -> tuple:
+
+    if cache is not None:
+        kwargs = dict(kwargs, cache = Cache(*cache))
+
+    exp = Experiment(*args, **kwargs)
+
+    start = time()
+    results = exp.begin()
+    end = time()
+
+    return *results, end - start, str(exp)
+
+
+
 class CriticalDensity:
-    def __init__(self, experiments: int, trials: int, rho_initial: float, cutoff_initial: int, do_cutoff: bool, r: int, step: float, alpha: float, lastn: int, finder_cutoff: float, stepper: callable = half_gradient, logdir: str = None) -> None:
+    def __init__(self, experiments: int, trials: int, rho_initial: float, cutoff_initial: int, do_cutoff: bool, r: int, step: float, alpha: float, lastn: int, finder_cutoff: float, stepper: callable = half_gradient, logdir: str = None, reveals_only: bool = False, summary: bool = False, sparse: bool = False, seed: int = None, workers: int = 1, sequential: float = None, confidence: float = 0.95, cache: Cache = None, engine: str = None, densities: int = 1, replay: bool = False) -> None:
         
         # The number of experiments to run
         self.experiments = experiments
@@ -129,6 +192,52 @@ class CriticalDensity:
         # Whether to end trials early
         self.do_cutoff = do_cutoff
 
+        # Whether experiments only count reveals.
+        # Fine for steppers that only look at reveals, like half_gradient; alpha_step needs frontiers
+        self.reveals_only = reveals_only
+
+        # Whether experiments only keep summaries of each trial's frontiers.
+        # Enough for alpha_step, which only needs the mean delta_f
+        self.summary = summary
+
+        # Whether experiments use the sparse frontier engine
+        self.sparse = sparse
+
+        # Which engine experiments run on, by name, or auto to pick the fastest for each
+        # experiment's density and cutoff. With none, the flags above pick one; except when bracketing,
+        # which judges a density by whether trials reach the cutoff, and so needs a board that grows to it
+        self.engine = engine if engine is not None or densities == 1 else 'grow'
+        assert densities == 1 or self.engine == 'auto' or ENGINES[self.engine].grows, f'Engine "{self.engine}" never reaches the cutoff, so cannot bracket'
+
+        # Seed of the whole run.
+        # Experiment e's trials are seeded from stream(seed, e, trial), so none of them share a stream
+        self.seed = seed
+
+        # How many processes each experiment spreads its trials over
+        self.workers = workers
+
+        # How many densities to try at once.
+        # With more than one, find brackets the critical density instead of stepping: each round
+        # runs an experiment at each of densities evenly spaced points inside the bracket, spread
+        # over the workers, and shrinks the bracket to the pair either side of the switch between
+        # infinite and finite. That divides the bracket by densities + 1 a round rather than 2
+        self.densities = densities
+
+        # Whether experiments stop once P(infinite) is confidently either side of this threshold,
+        # so trials are only spent on densities where the answer is in doubt
+        self.sequential = sequential
+        self.confidence = confidence
+
+        # Where experiments look for trials already run.
+        # A cache only saves time; which boards are swept is up to replay
+        self.cache = cache
+
+        # Whether experiments at the same density share their trials' seeds, from
+        # stream(seed, threshold(rho), trial), rather than each experiment having its own.
+        # Then a density that's revisited (as down_step does) replays the same boards,
+        # and with a cache comes straight from it rather than being swept again
+        self.replay = replay
+
 
         # Starting values.
         # This wil change after each experiment to hone
@@ -163,6 +272,9 @@ class CriticalDensity:
         self.lastn = lastn 
 
 
+        # The bracket each round of find started from, when trying several densities at once
+        self.brackets = []
+
         # A list of experimental results
         self.reveals = []
         self.alphas = []
@@ -176,9 +288,12 @@ class CriticalDensity:
 
 
 
-    # Finds the critical density by gradient descent (-ish)
+    # Finds the critical density by gradient descent (-ish), or by bracketing it with several densities at once
     def find(self, quiet = True) -> float:
-        
+
+        if self.densities > 1:
+            return self.bracketed(quiet)
+
         for experiment in range(self.experiments):
 
             # Breaks if there is a negligible change
@@ -190,7 +305,8 @@ class CriticalDensity:
                 print(f'Beginning experiment {experiment + 1} of {self.experiments}:')
 
             # Creates a new experiment
-            exp = Experiment(self.rho, self.cutoff, self.trials, self.do_cutoff, self.r)
+            args, kwargs = self.args(experiment, self.rho)
+            exp = Experiment(*args, **kwargs, workers = self.workers, cache = self.cache)
 
             # Runs the experiment
             start = time()
@@ -221,15 +337,115 @@ class CriticalDensity:
             self.step = nstep
             self.rho = nrho
 
+        self.log()
+
+        # The equilibrium value
+        return self.rho
+
+
+    # Finds the critical density by bracketing it, trying several densities each round.
+    # Starts from rho_initial ± step, or from [0, 1] (where rho = 0 is surely infinite, and
+    # rho = 1 surely not) without a step. Ends once the bracket is narrower than finder_cutoff,
+    # or after experiments rounds, and returns its middle
+    def bracketed(self, quiet = True) -> float:
+
+        if self.step > 0:
+            self.bracket = max(0, self.rho - self.step), min(1, self.rho + self.step)
+        else:
+            self.bracket = 0, 1
+        self.sure = self.bracket[0] == 0, self.bracket[1] == 1
+
+        # Experiments in a round run side by side, each on a single process
+        pool = ProcessPoolExecutor(self.workers, initializer = worker) if self.workers > 1 else None
+        cache = (self.cache.path, self.cache.size) if self.cache is not None else None
+
+        for round in range(self.experiments):
+
+            low, high = self.bracket
+            if high - low < self.finder_cutoff:
+                if not quiet:
+                    print(f'Critical density found; bracket narrower than {self.finder_cutoff:.3e}.\n')
+                break
+
+            if not quiet:
+                print(f'Beginning round {round + 1} of {self.experiments}:')
+                print(f'.. Bracket:\t\t[{low:.6f}, {high:.6f}]')
+
+            # Evenly spaced inside the bracket
+            rhos = [float(rho) for rho in np.linspace(low, high, self.densities + 2)[1 : -1]]
+            jobs = [(*self.args(len(self.rhos) + i, rho), cache) for i, rho in enumerate(rhos)]
+
+            start = time()
+            if pool is not None:
+                results = list(pool.map(run, *zip(*jobs)))
+            else:
+                results = [run(args, dict(kwargs, cache = self.cache)) for args, kwargs, _ in jobs]
+            end = time()
+
+            # Adds the experiments' results
+            for rho, (reveals, alphas, meta, taken, s) in zip(rhos, results):
+                self.reveals.append(reveals)
+                self.alphas.append(alphas)
+                self.metas.append(meta)
+                self.times.append(taken)
+                self.rhos.append(rho)
+
+            self.brackets.append(list(self.bracket))
+
+            # Shrinks the bracket
+            low, high, *sure = k_section(self, rhos, [result[2] for result in results])
+            self.bracket = low, high
+            self.sure = tuple(sure)
+            self.rho = (low + high) / 2
+
+
+            # Prints the round's results
+            if not quiet:
+                print(f'.. Infinite:\t\t' + ' '.join(f'{rho:.6f}' + ('*' if infinite_side(result[2]) else '') for rho, result in zip(rhos, results)))
+                print(f'.. Bracket:\t\t[{low:.6f}, {high:.6f}]')
+                print(f'.. Density:\t\t{self.rho:.6f}')
+                print(f'.. Time taken:\t\t{end - start:.4f}s\n')
+
+        if pool is not None:
+            pool.shutdown()
+
+        self.log()
+
+        return self.rho
+
+
+    # What Experiment takes for experiment number experiment, at density rho.
+    # With replay, experiments at the same density share their trials' seeds.
+    # Bracketing judges densities by whether trials reach the cutoff, so asks for a board that grows
+    def args(self, experiment: int, rho: float) -> tuple[tuple, dict]:
+
+        key = (threshold(rho),) if self.replay else (experiment,)
+
+        return (rho, self.cutoff, self.trials, self.do_cutoff, self.r), {
+            'reveals_only': self.reveals_only,
+            'summary':      self.summary,
+            'sparse':       self.sparse,
+            'seed':         self.seed,
+            'key':          key,
+            'sequential':   self.sequential,
+            'confidence':   self.confidence,
+            'engine':       self.engine,
+            'grow':         self.densities > 1
+        }
+
+
+    # Logs the finder's results
+    def log(self) -> None:
+
         if self.logdir:
             log(self.logdir, 'cdTimes', self.times)
             log(self.logdir, 'cdRhos',  self.rhos)
             log(self.logdir, 'cdReveals', self.reveals)
-            log(self.logdir, 'cdAlphas', self.alphas)
+            log(self.logdir, 'cdAlphas', [alphas.tolist() for alphas in self.alphas])
             log(self.logdir, 'cdMetas', self.metas)
 
-        # The equilibrium value
-        return self.rho
+            if self.brackets:
+                log(self.logdir, 'cdBrackets', self.brackets)
 
 
     def str_time(self):
@@ -0,0 +1,215 @@
+# The engines an experiment can run its trials on, by name.
+#
+# Every engine plays the same game on the same mine field, but which is fastest depends on the
+# cutoff and density (see the timings at the bottom of each engine). Each is registered with
+# what it can do:
+#   frontiers   whether it records each frontier's size and distance, rather than only counting reveals
+#   exact       whether its reveals and frontiers are the same as every other exact engine's, so results can be compared
+#   grows       whether its board grows until the cutoff in reveals, rather than being fixed at sqrt(cutoff)
+#   resumable   whether it can keep its state, to carry on to a bigger cutoff
+#
+# auto picks the fastest exact engine that can do what's asked, from a calibration table made by
+# timing every engine over a grid of cutoffs and densities. The table is kept on disk, and
+# has to be made beforehand with calibrate (main.calibrate), which takes a while.
+
+import os
+import json
+from math import log10
+from time import perf_counter
+
+import numpy as np
+
+import minesweeperp
+import minesweeperb
+import minesweeperc
+import minesweeperf
+from minesweeper import Minesweeper
+from minefield import stream
+from budget import Budget
+
+
+# Where the calibration table is kept
+TABLE = 'Results/engines.json'
+
+# The table, once loaded
+table = None
+
+
+class Engine:
+    def __init__(self, name: str, run: callable, frontiers: bool = True, exact: bool = True, grows: bool = False, resumable: bool = False) -> None:
+        self.name = name
+        self.run = run
+
+        self.frontiers = frontiers
+        self.exact = exact
+        self.grows = grows
+        self.resumable = resumable
+
+
+    # Runs a trial, returning its reveals, sizes and dists.
+    # With summary, the mean delta_f and largest frontier in place of sizes and dists;
+    # without frontiers, None for both
+    def __call__(self, rho: float, r: int, cutoff: int, seed: int = None, summary: bool = False, state: dict = None, budget: Budget = None) -> tuple:
+        return self.run(rho, r, cutoff, seed, summary, state, budget)
+
+
+ENGINES: dict[str, Engine] = {}
+
+# Registers an engine under its name
+def register(name: str, frontiers: bool = True, exact: bool = True, grows: bool = False, resumable: bool = False) -> callable:
+
+    def wrap(run: callable) -> callable:
+        ENGINES[name] = Engine(name, run, frontiers, exact, grows, resumable)
+        return run
+
+    return wrap
+
+
+# Sweeps a whole sqrt(cutoff) board a frontier at a time, as tensors
+@register('fixed')
+def fixed(rho: float, r: int, cutoff: int, seed: int, summary: bool, state: dict, budget: Budget) -> tuple:
+    return minesweeperp.minesweeper(rho, r, cutoff ** 0.5, summary = summary, seed = seed, budget = budget)
+
+# As fixed, but starts small and grows the board, stopping on reveals rather than the board's edge
+@register('grow', grows = True, resumable = True)
+def grow(rho: float, r: int, cutoff: int, seed: int, summary: bool, state: dict, budget: Budget) -> tuple:
+    return minesweeperp.minesweeperg(rho, r, cutoff, summary = summary, seed = seed, state = state, budget = budget)
+
+# Sweeps the frontier as a list of cells rather than a whole board
+@register('sparse')
+def sparse(rho: float, r: int, cutoff: int, seed: int, summary: bool, state: dict, budget: Budget) -> tuple:
+    return minesweeperf.minesweeper(rho, r, cutoff ** 0.5, summary = summary, seed = seed, budget = budget)
+
+# As fixed, on bit-packed rows.
+# Only returns every frontier, so is summarised here
+@register('bitboard')
+def bitboard(rho: float, r: int, cutoff: int, seed: int, summary: bool, state: dict, budget: Budget) -> tuple:
+
+    reveals, sizes, dists = minesweeperb.minesweeper(rho, r, cutoff ** 0.5, seed = seed, budget = budget)
+
+    if summary:
+        return reveals, *summarise(sizes)
+
+    return reveals, sizes, dists
+
+# Only counts reveals, by flood filling the cluster the start is in
+@register('count', frontiers = False)
+def count(rho: float, r: int, cutoff: int, seed: int, summary: bool, state: dict, budget: Budget) -> tuple:
+    return minesweeperc.minesweeper(rho, r, cutoff ** 0.5, seed = seed, budget = budget), None, None
+
+# The original, revealing a cell at a time from a queue.
+# Its layers are cells queued by the layer before rather than frontiers proper. With r >= 1 they
+# match the other engines' for trials that die out, but its board has no edge, so a trial that
+# reaches the edge of the sqrt(cutoff) board finishes the layer there, and its sizes (and so delta_f)
+# differ. With r = 0 even its reveals can: a nonzero origin reveals only itself here, where the
+# others spread from the origin whatever it is
+@register('serial', exact = False)
+def serial(rho: float, r: int, cutoff: int, seed: int, summary: bool, state: dict, budget: Budget) -> tuple:
+
+    board = Minesweeper(rho, cutoff, r, field = seed)
+    sizes, dists = board.sweep(True, cutoff ** 0.5, budget)
+
+    sizes = np.array(sizes, dtype = np.int32)
+    dists = np.array(dists, dtype = np.int32)
+
+    if summary:
+        return board.reveals, *summarise(sizes)
+
+    return board.reveals, sizes, dists
+
+
+# The mean delta_f and largest frontier of an engine that only returns every frontier
+def summarise(sizes: np.ndarray) -> tuple[float, int]:
+    return minesweeperp.summarise(len(sizes), int(sizes[0]), int(sizes[-1]), int(sizes.max())) if len(sizes) else (float('nan'), 0)
+
+
+# The engines that can do what's asked.
+# Only exact ones, as an experiment's results shouldn't depend on its engine, nor so on the calibration.
+# grows is for whatever judges trials by whether they reach the cutoff, which a fixed board never does
+def capable(frontiers: bool = False, resumable: bool = False, grows: bool = False) -> list[str]:
+    return [name for name, engine in ENGINES.items() if engine.exact and (engine.frontiers or not frontiers) and (engine.resumable or not resumable) and (engine.grows or not grows)]
+
+
+# Times every engine over a grid of cutoffs and densities, and saves the table to path.
+# Each engine runs the same seeded trials at each point, in summary, each with a budget of
+# seconds; a trial that runs out counts as taking all of it, so a slow engine is never picked for
+# being cut short. Times are the mean per trial
+def calibrate(cutoffs: list[int] = (1e3, 1e4, 1e5, 1e6), rhos: list[float] = (0.05, 0.10, 0.15), trials: int = 2, seconds: float = 1, seed: int = 0, path: str = TABLE, quiet: bool = True) -> dict:
+
+    global table
+
+    times = {name: [[0.0] * len(rhos) for _ in cutoffs] for name in ENGINES}
+
+    # Warms every engine up first, so the first point doesn't pay for compiling and allocating
+    for engine in ENGINES.values():
+        engine(rhos[0], 1, cutoffs[0], seed, True, None, Budget(seconds))
+
+    for i, cutoff in enumerate(cutoffs):
+        for j, rho in enumerate(rhos):
+            for name, engine in ENGINES.items():
+
+                for trial in range(trials):
+                    budget = Budget(seconds)
+
+                    start = perf_counter()
+                    engine(rho, 1, cutoff, stream(seed, i, j, trial), True, None, budget)
+                    end = perf_counter()
+
+                    times[name][i][j] += (seconds if budget.expired else end - start) / trials
+
+                if not quiet:
+                    print(f'.. cutoff = {cutoff:.0e}, rho = {rho:.2f}, {name}:\t{times[name][i][j]:.4f}s')
+
+    table = {'cutoffs': list(cutoffs), 'rhos': list(rhos), 'times': times}
+
+    if path:
+        if os.path.dirname(path) and not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        # Written beside the table then moved over it, so a reader never sees half a table
+        with open(f'{path}.{os.getpid()}', 'w') as f:
+            json.dump(table, f, indent = 1)
+        os.replace(f'{path}.{os.getpid()}', path)
+
+    return table
+
+
+# The fastest engine at the point of the table nearest (cutoff, rho) that can do what's asked.
+# Loads the table from path the first time
+def choose(cutoff: int, rho: float, frontiers: bool = False, resumable: bool = False, grows: bool = False, path: str = TABLE) -> str:
+
+    global table
+
+    if table is None:
+        assert os.path.exists(path), f'No calibration table at "{path}"; run engines.calibrate() first'
+        with open(path) as f:
+            table = json.load(f)
+
+    # Nearest in orders of magnitude of cutoff, then in density
+    i = min(range(len(table['cutoffs'])), key = lambda i: abs(log10(table['cutoffs'][i]) - log10(cutoff)))
+    j = min(range(len(table['rhos'])), key = lambda j: abs(table['rhos'][j] - rho))
+
+    names = [name for name in capable(frontiers, resumable, grows) if name in table['times']]
+    assert names, f'No calibrated engine can do what is asked'
+
+    return min(names, key = lambda name: table['times'][name][i][j])
+
+
+# The engine of an experiment's flags, as they picked one before there was a choice
+def legacy(reveals_only: bool = False, sparse: bool = False, grow: bool = False) -> str:
+    return 'count' if reveals_only else 'sparse' if sparse else 'grow' if grow else 'fixed'
+
+
+# A calibration on one CPU core, 2 trials per point with a 1s budget each (14s in all).
+# Mean time per trial; 1.0000s means every trial ran out of budget.
+#       CPU                         fixed       grow        sparse      bitboard    count       serial
+# .. cutoff = 1e3, rho = 0.10:      0.0071s     0.0213s     0.0024s     0.0015s     0.0025s     0.0030s
+# .. cutoff = 1e4, rho = 0.05:      0.0230s     0.0411s     0.0187s     0.0047s     0.0061s     0.0391s
+# .. cutoff = 1e5, rho = 0.05:      0.1390s     0.2854s     0.1472s     0.0251s     0.0325s     0.4545s
+# .. cutoff = 1e5, rho = 0.15:      0.0123s     0.0108s     0.0029s     0.0041s     0.0092s     0.0017s
+# .. cutoff = 1e6, rho = 0.05:      1.0000s     1.0000s     1.0000s     0.2326s     0.2566s     1.0000s
+# .. cutoff = 1e6, rho = 0.10:      0.1222s     0.0358s     0.0109s     0.0552s     0.1054s     0.0094s
+# .. cutoff = 1e6, rho = 0.15:      0.0929s     0.0045s     0.0012s     0.0293s     0.1052s     0.0008s
+# So auto picks the bitboard below the critical density, where most of the board is swept,
+# and the sparse engine above it, where trials die out long before the board's edge.
+# Serial is often fastest there, but isn't exact (its reveals differ with r = 0), so auto leaves it out.
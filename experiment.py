@@ -1,34 +1,145 @@
 # Experiment is a series of trials at a given density
 
-#from minesweeper import Minesweeper
-from minesweeperp import minesweeper
+from minesweeperp import minesweepers, summarise
+from engines import ENGINES, choose, legacy
+from minefield import stream
+from budget import Budget
+from cache import Cache
 
-from math import ceil
+from math import ceil, sqrt, isnan
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 
-from logger import log
+import numpy as np
+import torch
 
-import signal
+from logger import log, Store
+from stats import Welford, Histogram
+from ragged import Ragged
 
-def timeout_handler(signum, frame):
-    raise TimeoutError('Operation timed out.')
+
+# How many trials per worker a parallel experiment keeps queued or waiting to be recorded
+AHEAD = 4
+
+
+# Sets up each worker of a parallel experiment.
+# One thread each, else every worker's torch would try to use every core
+def worker() -> None:
+    torch.set_num_threads(1)
+
+
+# Runs a single trial on the engine of the given name.
+# A plain function, so a worker process can run it without a copy of the whole experiment
+def sweep(engine: str, rho: float, r: int, cutoff: int, seed: int = None, summary: bool = False, state: dict = None, budget: Budget = None) -> tuple:
+    return ENGINES[engine](rho, r, cutoff, seed, summary, state, budget)
+
+
+# Runs a trial on a budget of its own, made where the trial runs so time spent queueing isn't counted.
+# Returns the results, and whether the budget ran out before the trial finished
+def timed(args: tuple, seconds: float, steps: int, state: dict = None) -> tuple:
+    budget = Budget(seconds, steps)
+    return *sweep(*args, state = state, budget = budget), budget.expired
 
 
 class Experiment:
-    def __init__(self, rho: float, cutoff: int, trials: int, do_cutoff: bool = True, r: int = 1, logdir: str = None) -> None:
+    def __init__(self, rho: float, cutoff: int, trials: int, do_cutoff: bool = True, r: int = 1, logdir: str = None, batch: int = 1, grow: bool = False, reveals_only: bool = False, summary: bool = False, sparse: bool = False, seed: int = None, key: tuple[int] = (), resumable: bool = False, workers: int = 1, sequential: float = None, confidence: float = 0.95, seconds: float = None, steps: int = None, streaming: bool = False, cache: Cache = None, engine: str = None) -> None:
         self.rho = rho
         self.cutoff = cutoff
         self.trials = trials
         self.r = r
 
+        # How many boards to sweep together.
+        # Batching saves on per-trial overhead, which dominates at small cutoffs
+        self.batch = batch
+
+        # Whether to only count reveals, skipping the frontier sizes and distances
+        self.reveals_only = reveals_only
+
+        # Whether to only keep each trial's mean delta_f and largest frontier, rather than every frontier
+        self.summary = summary
+
+        # Which engine runs the trials, by name from engines.ENGINES.
+        # auto picks the fastest for the cutoff and density from the calibration table, one that grows
+        # if asked to or if sequential testing judges trials by whether they reach the cutoff;
+        # with none, the reveals_only, sparse and grow flags pick one as they always have, except that
+        # sequential testing needs a board that grows, as a fixed board stops at its edge before the cutoff
+        if engine is None:
+            engine = 'grow' if sequential is not None else legacy(reveals_only, sparse, grow)
+        elif engine == 'auto':
+            engine = choose(cutoff, rho, frontiers = not reveals_only, resumable = resumable, grows = grow or sequential is not None)
+
+        assert engine in ENGINES, f'Unknown engine "{engine}"'
+        assert ENGINES[engine].frontiers or reveals_only, f'Engine "{engine}" only counts reveals'
+        assert ENGINES[engine].grows or sequential is None, f'Engine "{engine}" never reaches the cutoff, so cannot be tested sequentially'
+        self.engine = engine
+
+        # Whether to start on a small board and grow it, stopping on reveals rather than board size
+        self.grow = ENGINES[engine].grows
+
+        # Seed of the run, and where this experiment sits in it.
+        # Each trial's mines come from the mine field, seeded by stream(seed, *key, trial).
+        # With no seed, trials are random as ever
+        self.seed = seed
+        self.key = tuple(key)
+
+        # Whether to keep the state of trials that reach the cutoff, so extend can carry them on.
+        # Only a resumable engine (the growable board) can; other trials are rerun from their seed instead
+        self.resumable = resumable
+        self.states = {}
+
+        # How many processes to spread trials over.
+        # Parallel trials must be seeded, so with no seed one is picked for the run
+        self.workers = workers
+
+        # Trials that stopped without dying out, which a bigger cutoff might take further
+        self.stopped = set()
+
         self.do_cutoff = do_cutoff
 
+        # Each trial's budget, in seconds and in its engine's steps; none unless asked for.
+        # A trial that runs out keeps what it swept so far, and is counted in expired. Its reveals
+        # fall short of where it would have got, so max, P(infinite) and the rest are biased by it.
+        # extend carries expired trials on as it does trials that reached the cutoff
+        self.seconds = seconds
+        self.steps = steps
+        self.expired = set()
+
+        # Sequential testing: stops once P(infinite) is confidently above or below this threshold,
+        # judged by the Wilson bounds on the fraction of trials to reach the cutoff so far.
+        # Why the experiment stopped goes in meta as stop: trials, infinite, above or below
+        self.sequential = sequential
+        self.confidence = confidence
+        self.infinite = 0
+        self.stop = None
+
         self.logdir = logdir
 
+        # Whether to write each trial's frontier sizes and distances to logdir as it finishes,
+        # rather than keeping them. Only each trial's mean delta_f and largest frontier are kept,
+        # as with summary, so memory doesn't grow with the frontiers
+        self.streaming = streaming and not summary and not reveals_only
+        if self.streaming:
+            assert logdir, 'Streaming needs a logdir to stream to'
+            self.stores = Store(logdir, 'expAlphas'), Store(logdir, 'expDists')
+
+        # Where to look for trials already run, and store those that weren't.
+        # Only seeded trials can be, so an unseeded experiment never looks.
+        # hits are the recorded trials that came from it
+        self.cache = cache
+        self.hits = set()
+
+        # Each trial's reveals, and its frontier sizes and distances as ragged arrays
         self.results = []
-        self.alphas = []
-        self.dists = []
+        self.alphas = Ragged()
+        self.dists = Ragged()
+
+        # Each trial's mean delta_f and largest frontier
+        self.deltas = []
+        self.fmaxes = []
 
-        signal.signal(signal.SIGALRM, timeout_handler)
+        # Running statistics of the reveals and mean delta_fs, so meta is there at any time.
+        # Rerunning a trial means starting them over, which is left until they're next needed
+        self.restat()
 
 
     # Starts the experiment
@@ -42,149 +153,475 @@ class Experiment:
 
 
         # Performs the experiment
-        for trial in range(self.trials):            
+        self.trials_left(quiet)
 
-            try:
+        if not quiet:
+            print(f'100%')
+            print(f'Experiment concluded.\n\n')
 
-                # Primes alarm
-                signal.alarm(60)
+        # Returns a compressed set of results
+        return self.process()
 
-                # Creates new board
-                #board = Minesweeper(self.rho, self.cutoff, self.r)
 
-                # Runs a trial
-                reveals, sizes, dists = minesweeper(self.rho, self.r, self.cutoff ** 0.5)
+    # Runs every trial not yet run.
+    # Only the fixed tensor board can batch
+    def trials_left(self, quiet: bool) -> None:
+        if self.workers > 1:
+            self.parallel(quiet)
+        elif self.batch > 1 and not self.reveals_only and self.engine == 'fixed':
+            self.batched(quiet)
+        else:
+            self.serial(quiet)
 
-                # Appends the results
-                self.results.append(reveals)
-                self.alphas.append(sizes.tolist())
-                self.dists.append(dists.tolist())
 
-                # Disables alarm
-                signal.alarm(0)
-            
-            # Crash anyways so I can see what happened
-            except TimeoutError:
-                raise TimeoutError(f'Oh, stars! Have been sweeping mines for too long!')
-            
-            # Ensures alarm is deactivated
-            finally:
-                signal.alarm(0)
+    # Runs one trial at a time, carrying on from any already run
+    def serial(self, quiet: bool) -> None:
 
+        for trial in range(len(self.results), self.trials):
 
-            # Stops the experiment if a board ever goes infinite
-            if reveals >= self.cutoff and self.do_cutoff:
-                break
+            # Runs a trial
+            reveals = self.record(trial, *self.run(trial))
+
+
+            # Stops the experiment if a board ever goes infinite, or the answer is clear
+            if self.decided(reveals):
+                return
 
             if not quiet and self.trials // 10 > 0 and trial % (self.trials // 10) == 0:
-                print(f'{ceil(trial / self.trials * 100)}%')
+                print(f'{ceil(trial / self.trials * 100)}%\t(mean reveals {self.rstats.mean:.1f})')
 
 
-        if not quiet:
-            print(f'100%')
-            print(f'Experiment concluded.\n\n')
+    # Runs a single trial, or carries it on if its state was kept
+    def run(self, trial: int) -> tuple:
+
+        # Only trials that reach the cutoff are worth keeping
+        state = self.states.pop(trial, {}) if self.resumable and ENGINES[self.engine].resumable else None
+
+        # A cached trial comes without its state, so extend reruns it from its seed instead
+        cached = self.lookup(trial)
+        if cached is not None:
+            return cached
+
+        results = timed(self.args(trial), self.seconds, self.steps, state)
+        self.store(trial, results)
+
+        if state is not None and (results[0] >= self.cutoff or results[-1]):
+            self.states[trial] = state
+
+        return results
+
+
+    # The engine trials are run on, and how; part of a trial's key in the cache.
+    # Batched trials come out the same as trials run one at a time, so share their entries
+    def method(self) -> str:
+        return self.engine + ('/summary' if self.summarised() else '')
+
+    # Whether the engine only needs to summarise each trial's frontiers.
+    # Enough for reveals_only too, when the engine records frontiers anyway
+    def summarised(self) -> bool:
+        return (self.summary or self.reveals_only) and ENGINES[self.engine].frontiers
+
+    # A trial's results from the cache, as if it had just been run but marked as cached, or None if it isn't there
+    def lookup(self, trial: int) -> tuple:
+
+        if self.cache is None or self.seed is None:
+            return None
+
+        result = self.cache.get(Cache.key(self.method(), self.rho, self.r, self.cutoff, self.trial_seed(trial)))
+        if result is None:
+            return None
+
+        return *result, False, True
+
+    # Caches a trial's results, unless it ran out of budget.
+    # Tensors are cached as arrays, which record takes just the same
+    def store(self, trial: int, results: tuple) -> None:
+
+        if self.cache is None or self.seed is None or results[-1]:
+            return
+
+        self.cache.put(
+            Cache.key(self.method(), self.rho, self.r, self.cutoff, self.trial_seed(trial)),
+            tuple(result.numpy() if isinstance(result, torch.Tensor) else result for result in results[: -1])
+        )
+
+
+    # What sweep needs to run a trial
+    def args(self, trial: int) -> tuple:
+        return self.engine, self.rho, self.r, self.cutoff, self.trial_seed(trial), self.summarised()
+
+
+    # Adds a trial's results, or replaces them if it was run before.
+    # Returns the reveals
+    def record(self, trial: int, reveals: int, sizes, dists, expired: bool = False, cached: bool = False) -> int:
+
+        new = trial == len(self.results)
+
+        # Keeps count of the trials that reached the cutoff
+        self.infinite += int(reveals >= self.cutoff) - (0 if new else int(self.results[trial] >= self.cutoff))
+
+        # A growable board only stops early at the cutoff, a fixed board also at its edge.
+        # Without the frontiers we can't tell the edge from dying out
+        if self.grow:
+            stopped = reveals >= self.cutoff
+        elif self.summary or self.reveals_only:
+            stopped = True
+        else:
+            stopped = len(sizes) == 0 or sizes[-1] != 0
+
+        if stopped or expired:
+            self.stopped.add(trial)
+        else:
+            self.stopped.discard(trial)
+
+        if expired:
+            self.expired.add(trial)
+        else:
+            self.expired.discard(trial)
+
+        if cached:
+            self.hits.add(trial)
+        else:
+            self.hits.discard(trial)
+
+        def put(results: list, result) -> None:
+            if new:
+                results.append(result)
+            else:
+                results[trial] = result
+
+        put(self.results, reveals)
+
+        # The mean delta_f and largest frontier come straight from summary, or else from the frontiers
+        delta = fmax = None
+        if self.summary and not self.reveals_only:
+            delta, fmax = sizes, dists
+        elif not self.reveals_only:
+            delta, fmax = summarise(len(sizes), int(sizes[0]), int(sizes[-1]), int(sizes.max()))
+
+            if self.streaming:
+                self.stores[0].append(trial, sizes)
+                self.stores[1].append(trial, dists)
+            else:
+                put(self.alphas, sizes)
+                put(self.dists, dists)
+
+        if delta is not None:
+            put(self.deltas, delta)
+            put(self.fmaxes, fmax)
+
+        if new and not self.stale:
+            self.accumulate(reveals, delta, fmax)
+        else:
+            self.stale = True
+
+        return reveals
+
+
+    # Adds a trial to the running statistics.
+    # A trial with a single frontier has no delta_f (it's nan), so is left out of them, as in graph
+    def accumulate(self, reveals: int, delta: float = None, fmax: int = None) -> None:
+
+        self.rstats.add(reveals)
+        self.histogram.add(reveals)
+
+        if delta is not None:
+            if not isnan(delta):
+                self.dstats.add(delta)
+            self.fmax = max(self.fmax, fmax)
+
+    # Starts the running statistics over from each trial's results
+    def restat(self) -> None:
+
+        self.rstats = Welford()
+        self.dstats = Welford()
+        self.histogram = Histogram()
+        self.fmax = 0
+
+        for trial, reveals in enumerate(self.results):
+            self.accumulate(reveals, *((self.deltas[trial], self.fmaxes[trial]) if self.deltas else ()))
+
+        self.stale = False
+
+
+    # Raises the cutoff, carrying on every trial that stopped short of dying out rather than starting over.
+    # Trials are resumed from their kept state where there is one and otherwise rerun from their seed,
+    # so either way they come out as if they'd been run to the new cutoff to begin with.
+    # Then runs any trials that do_cutoff skipped, unless one is still infinite.
+    def extend(self, cutoff: int, quiet: bool = True) -> dict:
+
+        self.cutoff = cutoff
+
+        # Trials that were infinite may not be any more, so whether to stop is decided afresh
+        self.infinite = sum(reveals >= cutoff for reveals in self.results)
+        self.stop = None
+
+        for trial in sorted(self.stopped):
+
+            assert trial in self.states or self.seed is not None, f'Cannot extend trial {trial} without its state or a seed'
+
+            self.record(trial, *self.run(trial))
+
+        if not self.decided(max(self.results)):
+            self.trials_left(quiet)
 
-        # Returns a compressed set of results
         return self.process()
 
 
-    # Compresses the results
+    # Runs trials in batches, sweeping several boards at once, carrying on from any already run
+    def batched(self, quiet: bool) -> None:
+
+        for start in range(len(self.results), self.trials, self.batch):
+
+            # The final batch may be smaller
+            n = min(self.batch, self.trials - start)
+
+            # Takes the batch from the cache if every trial in it is there
+            cached = [self.lookup(start + b) for b in range(n)]
+            hit = all(result is not None for result in cached)
+            if hit:
+                reveals, sizes, dists = ([result[i] for result in cached] for i in range(3))
+                expired = False
+
+            # Otherwise runs a batch of trials, with enough budget for every board in it.
+            # The batch shares its budget, so if it runs out every board in it counts as expired
+            else:
+                seeds = None if self.seed is None else [self.trial_seed(start + b) for b in range(n)]
+                budget = Budget(None if self.seconds is None else self.seconds * n, self.steps)
+
+                reveals, sizes, dists = minesweepers(self.rho, self.r, self.cutoff ** 0.5, n, summary = self.summary, seeds = seeds, budget = budget)
+                expired = budget.expired
+
+                for b in range(n):
+                    self.store(start + b, (reveals[b], sizes[b], dists[b], expired))
+
+
+            # Appends the results in trial order
+            for b in range(n):
+
+                self.record(start + b, reveals[b], sizes[b], dists[b], expired, hit)
+
+                # Stops the experiment if a board ever goes infinite, or the answer is clear.
+                # Later boards in the batch are discarded, as if they were never run
+                if self.decided(reveals[b]):
+                    return
+
+            if not quiet and start + n < self.trials and self.trials // 10 > 0 and (start + n) // (self.trials // 10) > start // (self.trials // 10):
+                print(f'{ceil((start + n) / self.trials * 100)}%\t(mean reveals {self.rstats.mean:.1f})')
+
+
+    # Runs trials across a pool of processes, carrying on from any already run.
+    # Results are recorded in trial order as they come in, so they match a serial run.
+    # Once a trial goes infinite, everything after it is cancelled and discarded, as with serial.
+    # States aren't kept; a parallel run always has a seed, so extend reruns trials from it instead.
+    def parallel(self, quiet: bool) -> None:
+
+        # Unseeded workers would all inherit the same generator and sweep the same boards
+        if self.seed is None:
+            self.seed = int(np.random.SeedSequence().entropy)
+
+        start = len(self.results)
+        done = {}
+
+        with ProcessPoolExecutor(self.workers, initializer = worker) as pool:
+
+            pending = {}
+
+            # The next trial to record, the next to queue, and where to stop
+            trial = start
+            queued = start
+            end = self.trials
+
+            while trial < end:
+
+                # Keeps a few trials per worker queued or waiting to be recorded.
+                # Queueing every trial at once would hold every result that came back early in memory
+                # Cached trials needn't go to the pool at all
+                while queued < end and len(pending) + len(done) < AHEAD * self.workers:
+                    cached = self.lookup(queued)
+                    if cached is not None:
+                        done[queued] = cached
+                    else:
+                        pending[pool.submit(timed, self.args(queued), self.seconds, self.steps)] = queued
+                    queued += 1
+
+                finished, _ = wait(pending, return_when = FIRST_COMPLETED) if pending else (set(), None)
+                for future in finished:
+                    t = pending.pop(future)
+                    done[t] = future.result()
+                    self.store(t, done[t])
+
+                # Trials after an infinite one will be discarded, so there's no point running them
+                if self.do_cutoff:
+                    end = min([end] + [t + 1 for t in done if done[t][0] >= self.cutoff])
+                    for future in [f for f in pending if pending[f] >= end]:
+                        future.cancel()
+                        pending.pop(future)
+
+                # Records whichever trials are next in order
+                while trial in done:
+
+                    reveals = self.record(trial, *done.pop(trial))
+
+                    # Stops the experiment if a board ever goes infinite, or the answer is clear
+                    if self.decided(reveals):
+                        pool.shutdown(cancel_futures = True)
+                        return
+
+                    if not quiet and self.trials // 10 > 0 and trial % (self.trials // 10) == 0:
+                        print(f'{ceil(trial / self.trials * 100)}%\t(mean reveals {self.rstats.mean:.1f})')
+
+                    trial += 1
+
+
+    # Whether to stop running trials, having just recorded one with the given reveals.
+    # Sets why in stop
+    def decided(self, reveals: int) -> bool:
+
+        if reveals >= self.cutoff and self.do_cutoff:
+            self.stop = 'infinite'
+
+        elif self.sequential is not None:
+            low, high = self.bounds()
+
+            if low > self.sequential:
+                self.stop = 'above'
+            elif high < self.sequential:
+                self.stop = 'below'
+
+        return self.stop is not None
+
+
+    # Bounds on P(infinite) from the trials so far.
+    # The test looks after every trial, so the error is split over every look it could make;
+    # then the chance of ever stopping on the wrong side is at most 1 - confidence
+    def bounds(self) -> tuple[float]:
+        return wilson(self.infinite, len(self.results), 1 - (1 - self.confidence) / self.trials)
+
+
+    # Metadata of the experimental parameters, and the results so far.
+    # From the running statistics, so it's cheap enough to look at as the experiment goes
+    def meta(self) -> dict:
+
+        if self.stale:
+            self.restat()
+
+        rstats = self.rstats
+
+        meta = {
+            'goal':     self.trials,
+            'trials':   rstats.n,
+            'rho':      self.rho,
+            'cutoff':   self.cutoff,
+            'd':        self.r,
+            'engine':   self.engine,
+            'max':      rstats.max,
+            'min':      rstats.min,
+            'mean':     rstats.mean,
+            'std':      rstats.std(),
+            'infinite': rstats.max >= self.cutoff
+        }
+
+        # Why the experiment stopped, and how sure it was
+        meta['stop'] = self.stop or 'trials'
+        if self.sequential is not None:
+            meta['pinf'] = self.infinite / rstats.n
+            meta['plow'], meta['phigh'] = self.bounds()
+            meta['confidence'] = self.confidence
+
+        # Trials that ran out of budget, whose results are only partial
+        meta['expired'] = len(self.expired)
+
+        # Enough to rerun any trial
+        if self.seed is not None:
+            meta['seed'] = self.seed
+            meta['key'] = self.key
+
+        # Trials taken from the cache rather than run
+        if self.cache is not None:
+            meta['cached'] = len(self.hits)
+
+        # Each trial's mean delta_f, and the largest frontier of any
+        if self.dstats.n > 0:
+            meta['dmin'] = self.dstats.min
+            meta['dmax'] = self.dstats.max
+            meta['dmean'] = self.dstats.mean
+            meta['dstd'] = self.dstats.std()
+            meta['fmax'] = self.fmax
+
+        return meta
+
+
+    # The seed of a trial, if the run has one
+    def trial_seed(self, trial: int) -> int:
+        return None if self.seed is None else stream(self.seed, *self.key, trial)
+
+
+    # Compresses the results, and logs them
     def process(self) -> dict:
 
-        try:
-
-            # Primes alarm
-            signal.alarm(10)
-
-            # A list of experimentally determined reveals, alphas packed together
-            reveals = self.results
-            alphas = self.alphas
-            dists = self.dists
-
-            # Metadata of the experimental parameters
-            meta = {
-                'goal':     self.trials,
-                'trials':   len(self.results),
-                'rho':      self.rho,
-                'cutoff':   self.cutoff,
-                'd':        self.r,
-                'max':      max(self.results),
-                'min':      min(self.results),
-                'mean':     sum(self.results) / len(self.results),
-                'infinite': max(self.results) == self.cutoff
-            }
-
-            # Adds extra info
+        # A list of experimentally determined reveals, alphas packed together
+        reveals = self.results
+        alphas = self.alphas
+        dists = self.dists
+
+        meta = self.meta()
+
+        # Logs the experiment
+        if self.logdir:
+            log(self.logdir, 'expReveals', reveals)
+            log(self.logdir, 'expMeta', meta)
+            log(self.logdir, 'expHistogram', [list(b) for b in self.histogram.bins()])
+
             if len(alphas) > 0:
-                if not isinstance(alphas[0], list):
-                    meta['amin'] = min(alphas)
-                    meta['amax'] = max(alphas)
-                    meta['amean'] = sum(alphas) / len(alphas)
-                else:
-                    deltaf = [[frontier[i + 1] - frontier[i] for i in range(len(frontier) - 1)] for frontier in alphas]
-                    deltaf_means = [sum(df) / len(df) for df in deltaf]
-                    
-                    meta['dmin'] = min(deltaf_means)
-                    meta['dmax'] = max(deltaf_means)
-                    meta['dmean'] = sum(deltaf_means) / len(deltaf_means)
-
-
-            # Logs the experiment
-            if self.logdir:
-                log(self.logdir, 'expReveals', reveals)
-                log(self.logdir, 'expMeta', meta)
-
-                if len(alphas) > 0:
-                    log(self.logdir, 'expAlphas', alphas)
-
-                if len(dists) > 0:
-                    log(self.logdir, 'expDists', dists)
-
-            # Disables alarm
-            signal.alarm(0)
-
-        # Crash anyways so I can see what happened
-        except TimeoutError:
-            raise TimeoutError(f'Oh, change! Ran into issue logging results!')
-        
-        # Ensures alarm is deactivated
-        finally:
-            signal.alarm(0)
+                log(self.logdir, 'expAlphas', alphas)
+
+            if len(dists) > 0:
+                log(self.logdir, 'expDists', dists)
 
         return reveals, alphas, meta
 
 
     def __str__(self) -> str:
 
-        mean = sum(self.results) / len(self.results)
-        alphas = self.alphas
+        meta = self.meta()
+        mean = meta['mean']
 
-        s = 'Experiment results: valid density.\n' if max(self.results) < self.cutoff else 'Experiment results: INFINTIE.\n'
+        s = 'Experiment results: valid density.\n' if meta['max'] < self.cutoff else 'Experiment results: INFINTIE.\n'
 
-        s += f'.. Trials:\t\t{len(self.results)} of {self.trials}\n'
+        s += f'.. Trials:\t\t{meta["trials"]} of {self.trials}\n'
         s += f'.. Density:\t\t{self.rho}\n'
         s += f'.. Cutoff:\t\t{self.cutoff}\n'
         s += f'.. Safe Radius:\t\t{self.r}\n'
         s += f'.. Average reveals:\t{mean}\t({mean / self.cutoff * 100:.2f}%)\n'
-        s += f'.. Minimum reveals:\t{min(self.results)}\n'
-        s += f'.. Maximum reveals:\t{max(self.results)}\n'
-
-        if len(alphas) > 0:
-            if not isinstance(alphas[0], list):
-                s += f'.. Average alpha:\t{sum(alphas) / len(alphas)}\n'
-                s += f'.. Minimum alpha:\t{min(alphas)}\n'
-                s += f'.. Maximum alpha:\t{max(alphas)}\n'
-            else:
-                deltaf = [[frontier[i + 1] - frontier[i] for i in range(len(frontier) - 1)] for frontier in alphas]
-                deltaf_means = [sum(df) / len(df) for df in deltaf]
+        s += f'.. Minimum reveals:\t{meta["min"]}\n'
+        s += f'.. Maximum reveals:\t{meta["max"]}\n'
 
-                s += f'.. Average delta:\t{sum(deltaf_means) / len(deltaf_means)}\n'
-                s += f'.. Minimum alpha:\t{min(deltaf_means)}\n'
-                s += f'.. Maximum alpha:\t{max(deltaf_means)}\n'
+        if 'dmean' in meta:
+            s += f'.. Average delta:\t{meta["dmean"]}\n'
+            s += f'.. Minimum alpha:\t{meta["dmin"]}\n'
+            s += f'.. Maximum alpha:\t{meta["dmax"]}\n'
+            s += f'.. Maximum frontier:\t{meta["fmax"]}\n'
 
         return s
 
 
+# Wilson score bounds on a proportion, from k successes in n trials.
+# Each bound is one-sided at the given confidence, since a test only ever looks at one of them
+def wilson(k: int, n: int, confidence: float) -> tuple[float]:
+
+    if n == 0:
+        return 0.0, 1.0
+
+    z = NormalDist().inv_cdf(confidence)
+    p = k / n
+
+    centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+    spread = z * sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+
+    return max(0.0, centre - spread), min(1.0, centre + spread)
+
+
 # Used to reformat experimental results into a string
 def etostr(meta):
 
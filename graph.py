@@ -4,6 +4,7 @@ from scipy.optimize import curve_fit
 from math import ceil, floor, log10
 
 from fits import linear, exponential, exponentialp1, powerp1, rationalp1, horizontal
+from ragged import Ragged
 
 
 # Formats a number with its uncertainty.
@@ -266,51 +267,38 @@ def show_max_alphas(alphas, cutoffs):
 
     plt.show()
 
-# Shows how a frontier behaves
+# Shows how a frontier behaves.
+# frontiers is a Ragged of each trial's frontier sizes; lists of lists are packed into one
 def show_frontiers(frontiers, reveals, meta):
 
+    if not isinstance(frontiers, Ragged):
+        frontiers = Ragged.from_lists(frontiers)
+
     # Successive differences, delta_f
-    deltaf = [[frontier[i + 1] - frontier[i] for i in range(len(frontier) - 1)] for frontier in frontiers]
+    deltaf = frontiers.diff()
 
 
     # Calculates the mean delta_f for each trial.
-    # Casts into numpy array for easy statistics
-    deltaf_means = np.array([sum(delta) / len(delta) for delta in deltaf])
+    # A trial with a single frontier has no delta_f, so is left out
+    deltaf_means = deltaf.means()
+    deltaf_means = deltaf_means[~np.isnan(deltaf_means)]
     growth = deltaf_means.mean()
     growth_unc = deltaf_means.std() / np.sqrt(len(deltaf_means))
     print(f'\n\tAverage delta_f for rho = {meta["rho"]}:\t{sigfigs(growth, growth_unc)}\n')
 
 
     # Performs a column-wise mean rather than a row-wise mean
-    cw = sorted(deltaf, key = lambda x: len(x), reverse = True) # cw for column-wise
-    column_mean = []
-    for i in range(len(cw[0])): # Iterates over the longest row
-
-        # Trims all rows shorter than i
-        cw = [row for row in cw if len(row) > i]
-
-        # Creates the column
-        col = [cw[j][i] for j in range(len(cw))]
-
-        # Adds the column's mean
-        column_mean.append(sum(col) / len(col))
+    column_mean = deltaf.column_means()
 
 
-    # Packs, sorts, and unpacks important lists.
-    # We do this so we can plot the same set of data readably.
-    # The sort + slice shows evenly spaced (in iteration space) (thus, hopefully representative) trials
-    packed = sorted(
-        [(frontiers[i], deltaf[i]) for i in range(len(frontiers))], # Packes together data
-        key = lambda x: len(x[0]),                                  # Sorts based on iterations to die out
-        reverse = True                                              # Plot biggest first, so it doesn't overshadow
-    #)[:: len(frontiers) // 5]                                       # Slices to get evenly spaced
-    )
-
-    # Unpacks data again
-    frontiers = [tup[0] for tup in packed]
-    deltaf = [tup[1] for tup in packed]
+    # Sorts the trials by iterations to die out, biggest first so it doesn't overshadow.
+    # We do this so we can plot the same set of data readably
+    order = np.argsort(-frontiers.lengths(), kind = 'stable')
+    frontiers = frontiers.take(order)
+    deltaf = deltaf.take(order)
 
     # Makes a subset of data so the plots look reasonable rather than just noise.
+    # The sort + slice shows evenly spaced (in iteration space) (thus, hopefully representative) trials
     fraction        = 5 # What fraction of data to include
     frontiers_few   = frontiers[::  len(frontiers)  // fraction]
     deltaf_few      = deltaf[::     len(deltaf)     // fraction]
@@ -324,7 +312,7 @@ def show_frontiers(frontiers, reveals, meta):
     # Plots in reverse 
     for frontier in frontiers_few:
         axes[0].plot(
-            [i for i in range(len(frontier))],
+            np.arange(len(frontier)),
             frontier,
             #label = u'$f_{max}$' + f' = {max(frontier)}',
             linewidth = 0.5
@@ -333,7 +321,7 @@ def show_frontiers(frontiers, reveals, meta):
     # Shows the change in successive frontier sizes
     for delta in deltaf_few:
         axes[1].plot(
-            [i for i in range(len(delta))],
+            np.arange(len(delta)),
             delta,
             #label = u'mean $\delta$' + f' = {sum(delta) / len(delta):.4f}',
             linewidth = 0.5
@@ -342,7 +330,7 @@ def show_frontiers(frontiers, reveals, meta):
 
     # Shows column-wise mean of delta_f
     axes[1].plot(
-        [i for i in range(len(column_mean))],
+        np.arange(len(column_mean)),
         column_mean,
         label = u'$\delta_f$ = ' + f'{sigfigs(growth, growth_unc)}',
         linewidth = 2
@@ -351,15 +339,15 @@ def show_frontiers(frontiers, reveals, meta):
 
 
     # Shows the mean frontier size by plotting its prefix sum
-    fx = [i for i in range(len(column_mean))]
-    frontier_prefix = [sum(column_mean[ : i + 1]) for i in range(len(column_mean))]
+    fx = np.arange(len(column_mean))
+    frontier_prefix = np.cumsum(column_mean)
 
     # Performs a linear fit to the mean frontier size
     fits, cov = curve_fit(linear, fx, frontier_prefix, (1, 0))
     uncs = np.sqrt(np.diag(cov))
 
     # Creates some y-data for the linear fit
-    fit_curve = [linear(x, *fits) for x in fx]
+    fit_curve = linear(fx, *fits)
 
     # Plots mean frontier
     axes[0].plot(
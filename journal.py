@@ -0,0 +1,104 @@
+# A journal of the changes each reveal makes to the board, for visualisation.
+#
+# Saving a copy of the board on every reveal costs O(n) per reveal, so O(n ** 2) over a trial.
+# Instead each reveal appends what it changed: (x, y, old flags, new flags) for each cell.
+# Any step is then rebuilt on demand by replaying the changes forwards (or backwards, using the
+# old flags) from wherever we last were, or from the nearest keyframe if that's closer.
+#
+# Boards are dicts of b(x, y) -> flags, with unplaced cells left out, as the old copies were.
+
+from array import array
+
+class Journal:
+    def __init__(self, start: dict[tuple[int]], every: int = 1024) -> None:
+
+        # The board before the first step
+        self.start = dict(start)
+
+        # Every change, one entry per array.
+        # A flag without bit 16 means the cell wasn't placed
+        self.xs     = array('i')
+        self.ys     = array('i')
+        self.olds   = array('B')
+        self.news   = array('B')
+
+        # Where each step's changes end, and the cell it revealed
+        self.ends   = array('L')
+        self.cxs    = array('i')
+        self.cys    = array('i')
+
+        # Boards every so many steps, made as the journal is replayed
+        self.every = every
+        self.keyframes: dict[int, dict[tuple[int]]] = {}
+
+        # The board as of the last step rebuilt; -1 is the start
+        self.board = dict(start)
+        self.at = -1
+
+
+    # Records a change to a cell
+    def change(self, x: int, y: int, old: int, new: int) -> None:
+        self.xs.append(x)
+        self.ys.append(y)
+        self.olds.append(old)
+        self.news.append(new)
+
+    # Ends a step, which revealed b(x, y)
+    def step(self, x: int, y: int) -> None:
+        self.ends.append(len(self.xs))
+        self.cxs.append(x)
+        self.cys.append(y)
+
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    # The board after step i, and the cell it revealed.
+    # The board is shared and changes with the next lookup; copy it to keep it
+    def __getitem__(self, i: int) -> tuple[dict[tuple[int]], tuple[int]]:
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f'step {i} not in journal of {len(self)} steps')
+
+        self.seek(i)
+
+        return self.board, (self.cxs[i], self.cys[i])
+
+    # Every board from step start onwards, as with [].
+    # Steps are rebuilt one at a time, so this is the quickest way to play through a trial
+    def frames(self, start: int = 0):
+        for i in range(start, len(self)):
+            yield self[i]
+
+
+    # Moves the board to step i
+    def seek(self, i: int) -> None:
+
+        # Jumps to the nearest keyframe at or before i, if that's closer than where we are
+        k = i - i % self.every
+        if k in self.keyframes and i - k < abs(i - self.at):
+            self.board = dict(self.keyframes[k])
+            self.at = k
+
+        while self.at < i:
+            self.at += 1
+            self.apply(self.at, self.news)
+
+            if self.at % self.every == 0 and self.at not in self.keyframes:
+                self.keyframes[self.at] = dict(self.board)
+
+        while self.at > i:
+            self.apply(self.at, self.olds)
+            self.at -= 1
+
+    # Sets the cells step i changed to either their new or old flags
+    def apply(self, i: int, flags: array) -> None:
+
+        board = self.board
+        for j in range(self.ends[i - 1] if i > 0 else 0, self.ends[i]):
+            if flags[j] & 16:
+                board[(self.xs[j], self.ys[j])] = flags[j] & 15
+            else:
+                board.pop((self.xs[j], self.ys[j]), None)
@@ -6,8 +6,12 @@ import os
 import csv
 import json
 
+import numpy as np
+
+from ragged import Ragged
+
 # Logs data from an experiment
-def log(dir: str, file: str, results: list | dict) -> None:
+def log(dir: str, file: str, results: list | dict | Ragged) -> None:
     
     # Ensures the logdir exists
     if not os.path.exists(f'Results/{dir}'):
@@ -22,9 +26,66 @@ def log(dir: str, file: str, results: list | dict) -> None:
         with open(f'Results/{dir}/{file}.csv', 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             writer.writerows(([f'{k}:{v}'] for k, v in results.items()))
+    elif isinstance(results, Ragged):
+        results.save(f'Results/{dir}/{file}')
     else:
         assert False, f'unknow results type "{type(results)}"'
 
+# Appends each trial's per-layer arrays to disk as it finishes, so they never pile up in memory.
+# Values go in {file}.bin as int32, one trial after another. {file}.idx holds an int64 (trial, end)
+# pair per entry, end being where its values stop. A trial that's rerun is just appended again;
+# its last entry is the one that counts.
+class Store:
+    def __init__(self, dir: str, file: str) -> None:
+
+        # Ensures the logdir exists
+        if not os.path.exists(f'Results/{dir}'):
+            os.makedirs(f'Results/{dir}')
+
+        self.path = f'Results/{dir}/{file}'
+        self.end = 0
+
+        # Starts afresh
+        open(f'{self.path}.bin', 'wb').close()
+        open(f'{self.path}.idx', 'wb').close()
+
+
+    # Adds a trial's values.
+    # Files are reopened each time, so nothing is left open or unflushed between trials
+    def append(self, trial: int, values) -> None:
+
+        values = np.asarray(values, dtype = np.int32)
+        self.end += len(values)
+
+        with open(f'{self.path}.bin', 'ab') as f:
+            f.write(values.tobytes())
+
+        with open(f'{self.path}.idx', 'ab') as f:
+            f.write(np.array([trial, self.end], dtype = np.int64).tobytes())
+
+
+# Reads back a store, or a saved Ragged, as each trial's values in trial order.
+# Memory mapped, so unless trials were rerun only the trials looked at are read
+def unstore(path: str) -> Ragged:
+
+    values = np.memmap(f'{path}.bin', dtype = np.int32, mode = 'r') if os.path.getsize(f'{path}.bin') > 0 else np.zeros(0, dtype = np.int32)
+    index = np.fromfile(f'{path}.idx', dtype = np.int64).reshape(-1, 2)
+
+    # Every entry, in the order they were appended
+    entries = Ragged(values, np.concatenate([[0], index[:, 1]]))
+
+    # Nothing rerun
+    if np.array_equal(index[:, 0], np.arange(len(index))):
+        return entries
+
+    # The last entry of each trial
+    last = {}
+    for entry, trial in enumerate(index[:, 0].tolist()):
+        last[trial] = entry
+
+    return entries.take([entry for _, entry in sorted(last.items())])
+
+
 # Unlogs an experiment or CD Finder
 def unlog(path: str):
 
@@ -42,24 +103,41 @@ def unlog(path: str):
                     reader = csv.reader(f)
                     results['expReveals'] = [int(line[0]) for line in reader]
 
+            # Older logs, from before frontiers were saved as ragged arrays
             case 'expAlphas.csv':
                 with open(f'{path}/{file}') as f:
-                    reader = csv.reader(f)
+                    lines = [line[0] for line in csv.reader(f)]
 
                     # Regular alpha value
                     try:
-                        results['expAlphas'] = [float(line[0]) for line in reader]
+                        results['expAlphas'] = [float(line) for line in lines]
 
                     # Lists of successive frontier sizes
-                    except:
-                        results['expAlphas'] = []
-                        for line in reader:
-                            splits = line[0].replace('[', '').replace(']', '').split(', ')
-                            results['expAlphas'].append([int(frontier) for frontier in splits])
+                    except ValueError:
+                        results['expAlphas'] = Ragged.from_lists([
+                            [int(frontier) for frontier in line.replace('[', '').replace(']', '').split(', ')]
+                            for line in lines
+                        ])
 
             case 'expDists.csv':
                 pass    # For now, ignore this one
 
+            # Each trial's frontier sizes and distances, saved or streamed
+            case 'expAlphas.bin' | 'expDists.bin':
+                results[file[: -4]] = unstore(f'{path}/{file[: -4]}')
+
+            case 'expAlphas.idx' | 'expDists.idx':
+                pass
+
+            # Log-spaced bins of reveals, as (low, high, count)
+            case 'expHistogram.csv':
+                with open(f'{path}/{file}') as f:
+                    reader = csv.reader(f)
+                    results['expHistogram'] = []
+                    for line in reader:
+                        low, high, count = line[0].replace('[', '').replace(']', '').split(', ')
+                        results['expHistogram'].append((float(low), float(high), int(count)))
+
             case 'expMeta.csv':
                 results['expMeta'] = {}
                 with open(f'{path}/{file}') as f:
@@ -99,6 +177,11 @@ def unlog(path: str):
                 with open(f'{path}/{file}') as f:
                     results['cdRhos'] = [float(line.strip()) for line in f]
 
+            case 'cdBrackets.csv':
+                with open(f'{path}/{file}') as f:
+                    reader = csv.reader(f)
+                    results['cdBrackets'] = [[float(end) for end in line[0].replace('[', '').replace(']', '').split(', ')] for line in reader]
+
             case 'cdTimes.csv':
                 with open(f'{path}/{file}') as f:
                     results['cdTimes'] = [float(line.strip()) for line in f]
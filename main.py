@@ -29,7 +29,7 @@
 # Similarly, trials -> inf, rho_critical -> increases.
 
 # Todo:
-#   * Get trials to cutoff early if they are very confident they are not infinite
+#   x   * Get trials to cutoff early if they are very confident they are not infinite
 #   x   * Improve CDFinder end condition
 #   -       - End when step is sufficiently small?
 #   x       - End when deviation between last n experiments is sufficiently small?
@@ -128,6 +128,8 @@
 import critical
 from critical import CriticalDensity
 from experiment import Experiment
+import engines
+from cache import Cache
 
 from time import time
 from math import floor, log10
@@ -153,6 +155,11 @@ def CDFinder():
     finder_cutoff = 1e-5
     lastn = 10
 
+    # How many densities to try at once; more than one brackets the critical density,
+    # spreading each round's experiments over the workers
+    densities = 1
+    workers = 1
+
     #stepper = critical.half_gradient
     stepper = critical.half_gradient
 
@@ -161,7 +168,7 @@ def CDFinder():
     #logdir = f'e{floor(log10(experiments))}x{floor(log10(trials))}x{floor(log10(cutoff))}rho{str(rho).replace(".", "-")}r{r}'
 
 
-    finder = CriticalDensity(experiments, trials, rho, cutoff, do_cutoff, r, step, alpha, lastn, finder_cutoff, stepper, logdir = logdir)
+    finder = CriticalDensity(experiments, trials, rho, cutoff, do_cutoff, r, step, alpha, lastn, finder_cutoff, stepper, logdir = logdir, workers = workers, densities = densities)
 
     rho_critical = finder.find(quiet)
 
@@ -179,13 +186,18 @@ def experiment():
     cutoff = int(1e4)
     do_cutoff = False
     r = 1
+    batch = 100
+    workers = 1
+
+    # fixed, grow, sparse, bitboard, count, serial, or auto to pick the fastest
+    engine = None
 
     #logdir = None
     logdir = f'expCustom'
     #logdir = f'{floor(log10(trials))}x{floor(log10(cutoff))}rho{str(rho).replace(".", "-")}r{r}'
 
 
-    exp = Experiment(rho, cutoff, trials, do_cutoff, r, logdir = logdir)
+    exp = Experiment(rho, cutoff, trials, do_cutoff, r, logdir = logdir, batch = batch, workers = workers, engine = engine)
 
     start = time()
     exp.begin(quiet = False)
@@ -205,12 +217,16 @@ def experiments():
 
     logdir = f'SmallCoarseAlphas/'
 
+    # Seeded, so sweeping the same grid again takes its trials from the cache
+    seed = 0
+    cache = Cache()
+
     data = arange(0, 0.2, 0.02)
 
 
     estart = time()
 
-    for datum in data:
+    for i, datum in enumerate(data):
 
         # Independent variable
         rho = datum
@@ -218,7 +234,7 @@ def experiments():
         # New subdir for the experiment
         subdir = f'{floor(log10(trials))}x{floor(log10(cutoff))}rho{str(rho).replace(".", "-")}r{r}'
 
-        exp = Experiment(rho, cutoff, trials, do_cutoff, r, logdir = logdir + subdir)
+        exp = Experiment(rho, cutoff, trials, do_cutoff, r, logdir = logdir + subdir, seed = seed, key = (i,), cache = cache)
 
         start = time()
         exp.begin(quiet = False)
@@ -256,7 +272,26 @@ def performance():
 
 
 
+# Times every engine over a grid of cutoffs and densities, for auto to pick from
+def calibrate():
+
+    cutoffs = (1e3, 1e4, 1e5, 1e6)
+    rhos = (0.05, 0.10, 0.15)
+
+    start = time()
+    engines.calibrate(cutoffs, rhos, quiet = False)
+    end = time()
+
+    for cutoff in cutoffs:
+        for rho in rhos:
+            print(f'.. cutoff = {cutoff:.0e}, rho = {rho:.2f}:\t{engines.choose(cutoff, rho)} (frontiers: {engines.choose(cutoff, rho, frontiers = True)})')
+
+    print(f'.. Time taken:\t\t{end - start:.4f}s')
+
+
+
 #CDFinder()
 experiment()
 #experiments()
 #performance()
+#calibrate()
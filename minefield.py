@@ -0,0 +1,66 @@
+# Counter-based mine field
+#
+# Whether a cell holds a mine is a hash of (seed, row, col), rather than the next draw from an RNG.
+# So a board doesn't have to be generated up front or in any particular order: any cell can be
+# looked up at any time, and every engine sees the same mines for the same seed.
+# Rows and columns are offsets from the origin, the first cell revealed.
+#
+# The hash is SplitMix64's finaliser, which is plenty random for this and cheap to vectorise.
+#
+# Seeds for each trial come from stream, so a whole run is reproducible from a single seed.
+
+import numpy as np
+
+M64 = (1 << 64) - 1
+M32 = (1 << 32) - 1
+
+# SplitMix64 constants
+GAMMA   = 0x9E3779B97F4A7C15
+MIX1    = 0xBF58476D1CE4E5B9
+MIX2    = 0x94D049BB133111EB
+
+
+# Mines at the given rows and columns, which may be arrays of any (matching) shape
+def mines(seed: int, rho: float, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    return hashes(seed, rows, cols) < threshold(rho)
+
+
+# Mines over a (h, w) window of the field whose top left cell is (top, left)
+def board(seed: int, rho: float, top: int, left: int, h: int, w: int) -> np.ndarray:
+    rows = np.arange(top, top + h, dtype = np.int64)[:, None]
+    cols = np.arange(left, left + w, dtype = np.int64)[None, :]
+    return mines(seed, rho, rows, cols)
+
+
+# The seed of one trial of a run.
+# key says which trial, e.g. (experiment, trial); different keys give independent streams, however
+# many processes or threads they are spread across, so any trial can be rerun on its own.
+def stream(seed: int, *key: int) -> int:
+    return int(np.random.SeedSequence(seed, spawn_key = key).generate_state(1, np.uint64)[0])
+
+
+# A cell is a mine when its hash, read as a fraction of 2 ** 64, is less than rho
+def threshold(rho: float) -> int:
+    return min(int(rho * (1 << 64)), M64)
+
+
+def mix(z: int) -> int:
+    z = (z + GAMMA) & M64
+    z = ((z ^ (z >> 30)) * MIX1) & M64
+    z = ((z ^ (z >> 27)) * MIX2) & M64
+    return z ^ (z >> 31)
+
+
+# Vectorised hashes of (seed, row, col).
+# uint64 arithmetic wraps, just as the masks do in mix
+def hashes(seed: int, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+
+    rows = np.asarray(rows).astype(np.uint64) & np.uint64(M32)
+    cols = np.asarray(cols).astype(np.uint64) & np.uint64(M32)
+
+    z = (rows | (cols << np.uint64(32))) ^ np.uint64(mix(seed & M64))
+
+    z = z + np.uint64(GAMMA)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(MIX1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(MIX2)
+    return z ^ (z >> np.uint64(31))
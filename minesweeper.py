@@ -1,33 +1,43 @@
 # An infinite board of minesweeper.
 
-# A cell is a bitflag int E 0, 7.
+# A cell is a bitflag int E 0, 63.
 #   1 = is revealed
-#   2 = is mine
+#   2 = is mine (drawn for every cell when the grid is made, placed or not)
 #   4 = at least one adjacent mine
 #   8 = item has been placed in the reveal queue
+#   16 = cell has been placed on the grid
+#   32 = cell is on the outermost ring of the grid
 
-from random import random
-from random import seed as sseed
-from copy import deepcopy
-from time import time
+from time import time_ns
+
+import numpy as np
+
+from minefield import board
+from journal import Journal
+from budget import Budget
 
 # rho is the density of mines, aka p(mine).
 # cutoff is the number of reveals before we say "yup, that's an infinite reveal".
-# Visualise pushes each step into a queue so we can go over the reveal stepwise later.
+# Visualise journals each step's changes so we can go over the reveal stepwise later.
 # r is the initial safezone radius; 0 -> classic start, 1 -> modern start.
+# field is the seed of a counter-based mine field; mines are then a function of position, not visit order.
+# evict drops revealed cells from the front of the reveal queue, so it only holds the cluster's perimeter.
 class Minesweeper:
-    def __init__(self, rho: float, cutoff: int, r: int = 1, visualise: bool = False, seed: float = None) -> None:
-        
+    def __init__(self, rho: float, cutoff: int, r: int = 1, visualise: bool = False, seed: int = None, field: int = None, evict: bool = False) -> None:
+
         # the number of reveals
         self.reveals: int = 0
 
         # a queue of which cells to reveal next.
         # this approach allows a radial expansion.
-        # Effectively a 1d list of vectors
-        self.rq: list[tuple[int]] = []
+        # Effectively a 1d list of grid indices
+        self.rq: list[int] = []
 
-        # The board grid
-        self.grid: dict[tuple[int]] = {}
+        # Whether to drop revealed cells from the queue, and how many have been.
+        # At ~36 bytes an entry the queue dwarfs the grid's 1 byte a cell, so this is what
+        # lets memory follow the perimeter rather than the area. rq[i] is reveal evicted + i
+        self.evict = evict
+        self.evicted = 0
 
         # The mine density
         self.rho: float = rho
@@ -37,70 +47,278 @@ class Minesweeper:
 
         # Whether to save info for later visualisation
         self.visualise = visualise
-        self.grids = []
-        self.cells = []
+        self.journal = None
         self.torqs = []
 
-        # Sets random seed
-        self.seed = seed if seed else time()
-        sseed(self.seed)
+        # Sets random seed.
+        # Each board has its own generator, so boards don't disturb each other or anything else
+        self.seed = seed if seed is not None else time_ns()
+        self.rng = np.random.default_rng(self.seed)
+
+        # Mine field seed, if any
+        self.field = field
+
+        # The board grid.
+        # A w x w square of cells, row by row, with b(0, 0) at its centre c.
+        # b(x, y) is at index (x + c) * w + y + c, so neighbours are a fixed offset away.
+        # It doubles whenever a cell on its outermost ring is revealed
+        self.w = 2 * max(64, r + 2) + 1
+        self.c = self.w // 2
+        self.grid: bytearray = ring(self.mines(self.w), self.w)
+
+        # Offsets to a cell's neighbours, and to itself
+        self.adj = offsets(self.w)
+
+        # Frontiers, when sweeping a layer at a time.
+        # The current layer is rq[start : end]; the origin is a layer of its own
+        self.sizes: list[int] = []
+        self.dists: list[int] = []
+        self.start = 0
+        self.end = 1
 
 
         # Starting cell.
-        self.rq.append((0, 0))
+        self.rq.append(self.index(0, 0))
 
-        # Creates the starting no-mine zone
+        # Creates the starting no-mine zone.
+        # Only b(0, 0) is queued; the rest of the zone is queued by the reveals as they spread from it,
+        # ring by ring, so each layer is one of minesweeperp's frontiers. Every cell inside the outer
+        # ring is a zero, so the whole zone is still revealed
         for dx in range(-r, r + 1):
             for dy in range(-r, r + 1):
 
-                # Adds the item to the reveal queue.
-                # Not b(0, 0) because we want that to be revealed first
-                if not (dx == 0 and dy == 0):
-                    self.rq.append((dx, dy))
+                # Initialises grid cell, clearing whatever mine was drawn there
+                self.grid[self.index(dx, dy)] = self.grid[self.index(dx, dy)] & ~2 | 16
 
-                # Initialises grid cell
-                self.grid[(dx, dy)] = 8
-                
+        self.grid[self.index(0, 0)] |= 8
 
-    # Does the game of expand
-    def sweep(self) -> None:
+        # Starts the journal from the starting zone
+        if visualise:
+            self.journal = Journal(self.snapshot())
+
+
+    # Does the game of expand.
+    # With layers, sweeps a frontier at a time and returns their sizes and distances instead.
+    # Given a budget, stops where it got to when the budget runs out; sweep again to carry on.
+    def sweep(self, layers: bool = False, d: float = None, budget: Budget = None) -> None:
+
+        if budget is not None:
+            return self.budgeted(layers, d, budget)
+
+        if layers:
+            return self.sweep_layers(d)
 
         # Local variables are faster than attributes!
         grid = self.grid
         rq = self.rq
+        adj = self.adj
         cutoff = int(self.cutoff)
-        rho = self.rho
         reveals = self.reveals
         visualise = self.visualise
 
         # Since we're calling this method a tone, faster to make it local
         reveal = self.reveal
 
+        # Counts from the front of what's left of the queue
+        evicted = self.evicted
+        reveals -= evicted
+        cutoff -= evicted
+
+        # When to next try evicting, if at all.
+        # A resumed sweep may already be past EVICT, so this is a threshold rather than an exact count
+        evict = self.evict
+        trim = EVICT
+
         # Tracks the growth factor
         alpha = 0
 
         # Keeps revealing cells until either the cutoff is reached, or no cells left to reveal
         while reveals < len(rq) and reveals < cutoff:
-            alpha += reveal(rq[reveals], grid, rq, rho, visualise)
+
+            # Makes room for the cell's neighbours
+            if grid[rq[reveals]] & 32:
+                self.grow()
+                grid = self.grid
+                adj = self.adj
+
+            alpha += reveal(rq[reveals], grid, rq, visualise, adj)
             reveals += 1
 
+            # Drops the revealed cells once there are at least as many as unrevealed,
+            # so the copy costs no more than the reveals that paid for it
+            if evict and reveals >= trim:
+                if reveals >= len(rq) - reveals:
+                    del rq[: reveals]
+                    evicted += reveals
+                    cutoff -= reveals
+                    reveals = 0
+                trim = reveals + EVICT
+
         # Updates value
-        self.reveals = reveals
+        self.reveals = reveals + evicted
+        self.evicted = evicted
 
         # Returns growth factor
-        return alpha / reveals
-    
+        return alpha / self.reveals
+
+
+    # Carries on sweeping to a bigger cutoff, as if the board had been swept to it in one go.
+    # Everything sweep needs is kept on the board: the grid, the queue, the random generator and
+    # the layer being swept, so this costs only the extra reveals.
+    # Layer sweeps should be given d, since by default the board's edge moves with the cutoff.
+    def extend(self, cutoff: int, layers: bool = False, d: float = None, budget: Budget = None) -> None:
+        self.cutoff = cutoff
+        return self.sweep(layers, d, budget)
+
+
+    # Sweeps TICK reveals at a time, checking the budget in between, so the sweep itself pays nothing.
+    # Each chunk carries on from the last as extend does, so the board comes out as if swept in one go.
+    # Takes at least one chunk; steps are reveals
+    def budgeted(self, layers: bool, d: float, budget: Budget) -> None:
+
+        cutoff = self.cutoff
+        d = d if d else cutoff ** 0.5
+
+        alpha = 0
+        first = True
+
+        try:
+            while not self.done(layers, cutoff):
+
+                if not first and budget.spent():
+                    budget.expired = True
+                    break
+                first = False
+
+                # Up to the next tick, or as many reveals as are left in the budget
+                before = self.reveals
+                self.cutoff = min(int(cutoff), before + TICK)
+                if budget.steps is not None:
+                    self.cutoff = min(self.cutoff, before + max(budget.steps, 1))
+
+                result = self.sweep(layers, d)
+                budget.take(self.reveals - before)
+
+                if not layers:
+                    alpha += result * self.reveals
+
+        finally:
+            self.cutoff = cutoff
+
+        return (self.sizes, self.dists) if layers else alpha / self.reveals
+
+
+    # Whether there's nothing left to sweep before the cutoff
+    def done(self, layers: bool, cutoff: int) -> bool:
+
+        if self.reveals >= cutoff or self.reveals - self.evicted >= len(self.rq):
+            return True
+
+        # Layer sweeps also stop when the frontier dies or reaches the edge
+        return layers and bool(self.sizes) and (self.sizes[-1] == 0 or self.dists[-1] == 0)
+
+
+    # Sweeps one frontier (a layer of the breadth-first reveal) at a time, as minesweeperp does.
+    # A layer is every cell queued while revealing the layer before, and its size is how many of
+    # them are zeroes, like minesweeperp's frontier. Distances are to the edge of a d x d board,
+    # sqrt(cutoff) by default like Experiment, and the sweep stops there too.
+    # Stopping at the cutoff partway through a layer leaves it unrecorded, to be finished if resumed.
+    def sweep_layers(self, d: float = None) -> tuple[list[int], list[int]]:
+
+        # Local variables are faster than attributes!
+        grid = self.grid
+        rq = self.rq
+        adj = self.adj
+        cutoff = int(self.cutoff)
+        reveals = self.reveals
+        visualise = self.visualise
+        sizes = self.sizes
+        dists = self.dists
+        start = self.start
+        end = self.end
+
+        reveal = self.reveal
+
+        # The board's side and centre, as in minesweeperp
+        d = int(d if d else cutoff ** 0.5) + 1
+        c = d // 2
+
+        # Counts from the front of what's left of the queue
+        evicted = self.evicted
+        reveals -= evicted
+        cutoff -= evicted
+        start -= evicted
+        end -= evicted
+
+        # Keeps revealing cells until the cutoff, the edge, or no cells left to reveal
+        while reveals < len(rq) and reveals < cutoff:
+
+            # Makes room for the cell's neighbours
+            if grid[rq[reveals]] & 32:
+                self.grow()
+                grid = self.grid
+                adj = self.adj
+
+            reveal(rq[reveals], grid, rq, visualise, adj)
+            reveals += 1
+
+            # Finishes a layer
+            if reveals == end:
+
+                zeroes = [self.coords(pos) for pos in rq[start : end] if not grid[pos] & 4]
+
+                # The origin is always the first frontier, as in minesweeperp
+                size = len(zeroes) if sizes else 1
+
+                # The frontier died out, so it has a final empty size like minesweeperp
+                if size == 0:
+                    sizes.append(0)
+                    break
+
+                sizes.append(size)
+                dists.append(min(min(c + x, d - 1 - c - x, c + y, d - 1 - c - y) for x, y in zeroes or [(0, 0)]))
+
+                # The next layer is everything this one queued
+                start, end = end, len(rq)
+
+                # Stops when the frontier reaches the edge
+                if dists[-1] == 0:
+                    break
+
+                # A layer that queued nothing, such as a nonzero origin with r = 0, leaves an empty one
+                if start == end:
+                    sizes.append(0)
+                    break
+
+                # Drops revealed layers, as in sweep
+                if self.evict and start >= EVICT and start >= end - start:
+                    del rq[: start]
+                    evicted += start
+                    cutoff -= start
+                    reveals -= start
+                    end -= start
+                    start = 0
+
+        # Updates values
+        self.reveals = reveals + evicted
+        self.evicted = evicted
+        self.start = start + evicted
+        self.end = end + evicted
+
+        return sizes, dists
+
 
     # Performs a "single" reveal
-    def reveal(self, pos: tuple[int], grid: dict[tuple[int]], rq: list[tuple[int]], rho: float, visualise: bool) -> None:
+    def reveal(self, pos: int, grid: bytearray, rq: list[int], visualise: bool, adj: tuple[int]) -> None:
 
         # I will likely remove this check once everything is working.
         # This check decreases performance! But only by a hair
-        assert not grid[pos] & 3, f"Issue revealing cell b({pos[0]}, {pos[1]}) = {grid[pos]}"
+        assert not grid[pos] & 3, f"Issue revealing cell b{self.coords(pos)} = {grid[pos]}"
 
+        # A reveal only changes the 3 x 3 block around the cell, so that's all we need to journal
+        if visualise:
+            block = [grid[pos + offset] for offset in adj]
 
-        # Unpacks positions for quick reference
-        x, y = pos[0], pos[1]
 
         # Reaveals the cell
         grid[pos] |= 1
@@ -109,49 +327,145 @@ class Minesweeper:
         # the number of cells this reveal has added to the torq.
         alpha = 0
 
-        
+
         # Creates new cells in unoccupied grid positions
-        for dx in (-1, 0, 1):
-            for dy in (-1, 0, 1):
+        for offset in adj:
 
-                # Gets the new position
-                npos = (x + dx, y + dy)
+            # Gets the new position
+            npos = pos + offset
 
-                # Fills unoccupied cells
-                if npos not in grid:
+            # Places unoccupied cells.
+            # Their mines were drawn with the grid
+            if not grid[npos] & 16:
+                grid[npos] |= 16
 
-                    # 2 means there a mine, 8 is that it's in the to reveal queue
-                    grid[npos] = 2 if random() < rho else 0
 
+            # Updates newly revealed cell for is nonzero
+            if grid[npos] & 2:
+                grid[pos] |= 4
 
-                # Updates newly revealed cell for is nonzero
-                if grid[npos] & 2:
-                    grid[pos] |= 4
-        
 
         # Reveals adjacent cells, if self is zero
-        if not grid[pos] & 4:        
-            for dx in (-1, 0, 1):
-                for dy in (-1, 0, 1):
+        if not grid[pos] & 4:
+            for offset in adj:
 
-                    # Gets the new position
-                    npos = (x + dx, y + dy)
+                # Gets the new position
+                npos = pos + offset
 
-                    # Neither revealed nor in reveal queue
-                    if not grid[npos] & 9:
-                        rq.append(npos)
-                        grid[npos] |= 8
-                        alpha += 1
+                # Neither revealed nor in reveal queue
+                if not grid[npos] & 9:
+                    rq.append(npos)
+                    grid[npos] |= 8
+                    alpha += 1
 
-        # Save data for visualisation later
+        # Save data for visualisation later.
+        # The ring flag is left out; it's only the grid's business
         if visualise:
-            self.grids.append(deepcopy(grid))
-            self.cells.append(pos)
+            journal = self.journal
+            for offset, old in zip(adj, block):
+                if grid[pos + offset] != old:
+                    journal.change(*self.coords(pos + offset), old & 31, grid[pos + offset] & 31)
+            journal.step(*self.coords(pos))
             #self.torqs.append(torq if not grid[pos] & 4 else [])
 
         return alpha
 
 
+    # Grid index of b(x, y), and back again
+    def index(self, x: int, y: int) -> int:
+        return (x + self.c) * self.w + y + self.c
+
+    def coords(self, i: int) -> tuple[int]:
+        return i // self.w - self.c, i % self.w - self.c
+
+
+    # Doubles the grid, keeping the old grid at its centre.
+    # The reveal queue is renumbered in place, so anything holding it sees the new indices
+    def grow(self) -> None:
+
+        w = self.w
+        W = 2 * w + 1
+        o = (W - w) // 2
+
+        # Copies each row into the middle of the new grid; the old ring is no longer the edge
+        old = self.grid.translate(INTERIOR)
+        grid = self.mines(W)
+        for row in range(w):
+            start = (row + o) * W + o
+            grid[start : start + w] = old[row * w : (row + 1) * w]
+
+        self.rq[:] = [(i // w + o) * W + i % w + o for i in self.rq]
+
+        self.grid = ring(grid, W)
+        self.w = W
+        self.c = W // 2
+        self.adj = offsets(W)
+
+
+    # A w x w grid with its mines already drawn, centred on b(0, 0).
+    # Drawing every cell's mine up front, a block of rows at a time, is much cheaper than calling
+    # random() for each cell as it's placed; placing a cell then only sets 16.
+    # Draws follow from the seed and the grid's size, so the same seed gives the same board
+    def mines(self, w: int) -> bytearray:
+
+        grid = bytearray(w * w)
+        c = w // 2
+        rows = max(1, BLOCK // w)
+
+        for top in range(0, w, rows):
+            h = min(rows, w - top)
+
+            if self.field is None:
+                mines = self.rng.random((h, w)) < self.rho
+            else:
+                mines = board(self.field, self.rho, top - c, -c, h, w)
+
+            grid[top * w : (top + h) * w] = (mines.view(np.uint8) << 1).tobytes()
+
+        return grid
+
+
+    # The placed cells as a dict of b(x, y) -> flags
+    def snapshot(self) -> dict[tuple[int]]:
+        return {self.coords(i): flags & 15 for i, flags in enumerate(self.grid) if flags & 16}
+
+
+# Offsets to the 3 x 3 block around a cell in a grid of width w, in the order
+# the old (dx, dy) loops visited them
+def offsets(w: int) -> tuple[int]:
+    return tuple(dx * w + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+
+# Marks the outermost ring of a w x w grid
+def ring(grid: bytearray, w: int) -> bytearray:
+
+    grid[: w] = bytes(b | 32 for b in grid[: w])
+    grid[-w :] = bytes(b | 32 for b in grid[-w :])
+
+    for row in range(1, w - 1):
+        grid[row * w] |= 32
+        grid[row * w + w - 1] |= 32
+
+    return grid
+
+
+# Fewest revealed cells worth evicting from the queue at once
+EVICT = 1 << 16
+
+
+# Reveals between checks of a budget
+TICK = 1 << 12
+
+
+# Most cells to draw mines for at a time
+BLOCK = 1 << 16
+
+
+# Clears the ring flag
+INTERIOR = bytes(b & ~32 for b in range(256))
+
+
+
 # Following is a list of performance data and the changes relative to old or current.
 # The following data was performed in the order listed.
 # All trials will be using the following parameters:
@@ -387,3 +701,72 @@ class Minesweeper:
 # .. Median time:         6.1803s
 # .. Minimum time:        6.2780s
 # .. Maximum time:        6.0722s
+#
+# Grid as a growable bytearray indexed by integers, rather than a dict of tuples
+# (mean of 3 runs of 100 trials, same seeds; the control is the dict grid on this machine):
+#   Dict grid
+# .. Mean time:           7.8935s
+# .. Minimum time:        7.7412s
+# .. Maximum time:        8.0841s
+#   Bytearray grid
+# .. Mean time:           3.4969s
+# .. Minimum time:        3.3715s
+# .. Maximum time:        3.5726s
+#
+# Peak memory of a single 1e6 reveal trial, rho = 0.05 (tracemalloc):
+# .. Dict grid:           265.8 MB
+# .. Bytearray grid:      85.3 MB
+#
+# Visualising with a journal of each reveal's changes, rather than a deepcopy of the grid per reveal.
+# Single trial, rho = 0.1, seed = 2:
+#   Cutoff          deepcopy        Journal
+# .. 3000:          22.140s         0.023s
+# .. 10000:         237.390s        0.133s
+# .. 100000:        -               0.605s (seeking to the middle step from the start: 0.263s)
+#
+# Sweeping a layer at a time (sweep(layers = True)), recording frontier sizes and distances.
+# 200 trials, rho = 0.12, cutoff = 10000:
+# .. Plain:         0.5032s
+# .. Layers:        0.5201s
+#
+# Evicting revealed cells from the reveal queue (evict = True).
+# Single trial, 1e6 reveals, rho = 0.05; peak memory from tracemalloc:
+#   Kept
+# .. Time:          4.45s
+# .. Peak memory:   85.3 MB     (queue: 1003585 cells, grid: 4.3 MB)
+#   Evicted
+# .. Time:          3.15s
+# .. Peak memory:   9.5 MB      (queue: 20545 cells, grid: 4.3 MB)
+#
+# Drawing every cell's mine when the grid is made (a numpy block of rows at a time), rather than
+# calling random() as each cell is placed. Mean of 3 runs, process time, same seeds:
+#   100 trials, rho = 0.05, cutoff = 10000
+# .. random():      3.2611s     (min 2.9633s, max 3.4517s)
+# .. Bulk:          2.9448s     (min 2.7450s, max 3.2072s)
+#   200 trials, rho = 0.12, cutoff = 10000 (mostly small boards that die early)
+# .. random():      0.3836s
+# .. Bulk:          0.3940s
+#   Single trial, rho = 0.05, 1e6 reveals
+# .. random():      3.593s
+# .. Bulk:          3.317s
+#   100 trials, rho = 0.05, cutoff = 10000, counter-based field (hashing a cell at a time before)
+# .. Per cell:      6.5848s
+# .. Bulk:          2.9900s
+#
+# Buffering random() draws and handing them out one at a time with next() was tried first:
+# ~100 ns a cell either way, so no gain. The win is in not touching each cell's draw at all.
+#
+# Queueing only b(0, 0) and letting the start zone be queued ring by ring as it's revealed, rather
+# than queueing the whole zone behind it. Layer sizes and distances against minesweeperf on the same
+# mine field, for trials that die before the edge (20 trials each, cutoff = 10000):
+#       Layers match        Zone queued up front     Ring by ring
+# .. r = 1, rho = 0.12:     19/19                    19/19
+# .. r = 2, rho = 0.12:     0/15                     15/15
+# .. r = 2, rho = 0.15:     0/20                     20/20
+# .. r = 3, rho = 0.15:     0/20                     20/20
+# Layer 1 used to hold the whole zone, e.g. [1, 10, 2, 2, 2, 3] for minesweeperf's [1, 8, 2, 2, 2, 2].
+# Plain sweeps reveal the same cells either way (r = 0 to 3, with and without evict).
+#
+# That holds for r >= 1 only. With r = 0 the origin can be nonzero, and then only it is revealed,
+# as [1, 0], where minesweeperp and the rest spread from the origin regardless, e.g. 18 reveals
+# and [1, 2, 0] on the same field. 12 of 20 trials at rho = 0.12 on fields stream(3, trial) did.
@@ -0,0 +1,156 @@
+# Bitboard Minesweeper
+#
+# Same board and sweep as minesweeperp, but every state is stored as bit-packed rows:
+# each row of the board is a run of uint64 words, 64 cells per word.
+# Neighbours are found with shifts, ORs and ANDs on whole words instead of casting
+# to float32 and convolving, so each frontier step moves 1/32 the memory.
+
+import numpy as np
+
+from minefield import board
+from budget import Budget
+
+# Bits per word
+W = 64
+
+# Given a budget, stops when it runs out and returns what was swept so far
+def minesweeper(rho: float, s: int, d: int, seed: int = None, budget: Budget = None) -> tuple[int, np.ndarray, np.ndarray]:
+
+    # Makes the grid size odd so that it has a centre
+    d = int(d) + 1
+
+    # Centre of the grid
+    c = d // 2
+
+    # Mask of the cells that are on the board.
+    # The last word of a row may have bits past the edge, which must stay off
+    valid = pack(np.ones((d, d), dtype = bool))
+
+    # Places mines, from the mine field if there's a seed, then creates a starting zone with no mines
+    mines = np.random.random((d, d)) < rho if seed is None else board(seed, rho, -c, -c, d, d)
+    mines[c - s : c + s + 1, c - s : c + s + 1] = False
+
+    # Bitboards to track state
+    mines       = pack(mines)
+    unrevealed  = valid.copy()
+    frontier    = np.zeros_like(valid)
+
+    # Find cells not adjacent to a mine
+    zeroes      = ~adj(mines) & valid
+
+    # Initial reveal
+    frontier[c, c // W] |= np.uint64(1) << np.uint64(c % W)
+
+
+    # Propogates while there is a frontier
+    unrevealed, sizes, dists = sweep(frontier, unrevealed, zeroes, d, budget)
+
+    # Counts revealed cells and their non-zero neighbours, as in minesweeperp
+    reveals = popcount(adj(~unrevealed & valid))
+
+
+    # Return results
+    return reveals, sizes, dists
+
+
+# Packs a (d, d) boolean board into (d, ceil(d / 64)) uint64 rows.
+# Bit j of word k in a row is column 64 * k + j.
+def pack(cells: np.ndarray) -> np.ndarray:
+
+    # Pads columns to a whole number of words
+    d = cells.shape[1]
+    padded = np.zeros((cells.shape[0], -(-d // W) * W), dtype = bool)
+    padded[:, : d] = cells
+
+    return np.packbits(padded, axis = 1, bitorder = 'little').view('<u8')
+
+
+# Neighbours of every set cell, not including the cell itself
+def adj(cells: np.ndarray) -> np.ndarray:
+
+    # Left and right neighbours.
+    # Bits moving past the end of a word carry into the next word
+    h = (cells << np.uint64(1)) | (cells >> np.uint64(1))
+    h[:, 1 :]   |= cells[:, : -1] >> np.uint64(W - 1)
+    h[:, : -1]  |= cells[:, 1 :] << np.uint64(W - 1)
+
+    # Above and below neighbours of the cell and of its left and right neighbours
+    hc = h | cells
+    h[1 :]      |= hc[: -1]
+    h[: -1]     |= hc[1 :]
+
+    return h
+
+
+# Number of set bits.
+# bitwise_count is only in numpy 2.0 and later
+if hasattr(np, 'bitwise_count'):
+    def popcount(cells: np.ndarray) -> int:
+        return int(np.bitwise_count(cells).sum())
+else:
+    def popcount(cells: np.ndarray) -> int:
+        return int(np.unpackbits(cells.view(np.uint8)).sum())
+
+
+def sweep(frontier: np.ndarray, unrevealed: np.ndarray, zeroes: np.ndarray, d: int, budget: Budget = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+
+    # Used to track alpha
+    sizes = []
+
+    # Used to track the wavefront closest to the edge of the board
+    dists = []
+
+    # Sweep until the frontier wave-front goes exctinct
+    while frontier.any():
+
+        # Stops where it got to if the budget runs out, though never before the first step
+        if budget is not None:
+            if sizes and budget.spent():
+                budget.expired = True
+                break
+            budget.take()
+
+        # Tracks the size of the frontier
+        sizes.append(popcount(frontier))
+
+        # Rows the frontier occupies
+        rows = np.flatnonzero(frontier.any(axis = 1))
+
+        # Columns the frontier occupies, by unpacking a single OR of every row
+        cols = np.flatnonzero(np.unpackbits(
+            np.bitwise_or.reduce(frontier, axis = 0).view(np.uint8),
+            bitorder = 'little'
+        ))
+
+        # Calculates the minimum distance to an edge
+        dist_min = min(rows[0], d - 1 - rows[-1], cols[0], d - 1 - cols[-1])
+        dists.append(dist_min)
+
+        # Breaks early when the frontier reaches the edge
+        if dist_min == 0:
+            break
+
+        # Updates revealed cells
+        unrevealed ^= frontier
+
+        # Propogates the wavefront
+        frontier = adj(frontier) & unrevealed & zeroes
+
+    # The frontier died out, so it has a final empty size like minesweeperp
+    else:
+        sizes.append(0)
+
+    return unrevealed, np.array(sizes, dtype = np.int32), np.array(dists, dtype = np.int32)
+
+
+
+# Bitboard vs. minesweeperp, same boards.
+#   Density     = 0.05
+#
+#   d = 100, 100 trials
+# .. Tensor:      1.2958s
+# .. Bitboard:    0.3316s
+#
+#   d = 1000, 20 trials
+# .. Tensor:      579.2313s
+# .. Bitboard:    3.0705s
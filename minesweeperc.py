@@ -0,0 +1,71 @@
+# Cluster Minesweeper
+#
+# When all we want is the number of reveals, there's no need to walk the frontier layer by layer.
+# Instead, label every cluster of zeroes on the board in a single (compiled) pass, pick out
+# the origin's, then add its non-zero border.
+# Gives the same reveals as minesweeperp, but no frontier sizes or distances.
+
+import numpy as np
+from scipy import ndimage
+
+from minefield import board
+from budget import Budget
+
+from minesweeperb import pack, adj, popcount, sweep
+
+# Neighbourhoods.
+# Zeroes connect to any of their 8 neighbours; reveals are a cluster's neighbours, not including itself
+CONNECT = np.ones((3, 3), dtype = bool)
+BORDER  = np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype = bool)
+
+# A budget only limits the walk along the frontier, when there is one; labelling is a single pass
+def minesweeper(rho: float, s: int, d: int, seed: int = None, budget: Budget = None) -> int:
+
+    # Makes the grid size odd so that it has a centre
+    d = int(d) + 1
+
+    # Centre of the grid
+    c = d // 2
+
+    # Places mines, from the mine field if there's a seed, then creates a starting zone with no mines
+    mines = np.random.random((d, d)) < rho if seed is None else board(seed, rho, -c, -c, d, d)
+    mines[c - s : c + s + 1, c - s : c + s + 1] = False
+
+    # Find cells not adjacent to a mine.
+    # Like minesweeperp, a lone mine counts; it can only be reached with no starting zone
+    zeroes = ~ndimage.binary_dilation(mines, BORDER)
+
+    # Labels every cluster of zeroes at once
+    labels, _ = ndimage.label(zeroes, CONNECT)
+
+    # The origin is always revealed, and spreads to every cluster of zeroes it touches.
+    # Usually that is just its own, but with no starting zone the origin may be non-zero
+    touching = np.unique(labels[max(c - 1, 0) : c + 2, max(c - 1, 0) : c + 2])
+    cluster = np.isin(labels, touching[touching > 0])
+    cluster[c, c] = True
+
+
+    # A cluster touching the edge would have stopped the sweep partway,
+    # so we have to walk the frontier after all to know where it stopped.
+    if cluster[0].any() or cluster[-1].any() or cluster[:, 0].any() or cluster[:, -1].any():
+
+        valid = pack(np.ones((d, d), dtype = bool))
+
+        frontier = np.zeros((d, d), dtype = bool)
+        frontier[c, c] = True
+        frontier = pack(frontier)
+
+        unrevealed, _, _ = sweep(frontier, valid.copy(), ~adj(pack(mines)) & valid, d, budget)
+
+        return popcount(adj(~unrevealed & valid))
+
+
+    # Counts the cluster's neighbours, which includes the cluster itself unless it is a single cell
+    return int(ndimage.binary_dilation(cluster, BORDER).sum())
+
+
+
+# Cluster labelling vs. minesweeperp, same density.
+#   d = 1000, 20 trials, rho = 0.1
+# .. Tensor:      4.4758s
+# .. Cluster:     2.2110s
@@ -0,0 +1,173 @@
+# Frontier Minesweeper
+#
+# Same board and sweep as minesweeperp, but the frontier is a flat list of cell indices
+# rather than a whole board. Each step gathers the 8 neighbours of every frontier cell with
+# precomputed index offsets and keeps the unique ones, so a step costs O(|frontier|) instead of O(d ** 2).
+# Near the critical density the frontier is a thin ring, so this is where it pays off.
+#
+# With a seed, mines come from the counter-based mine field, and are only looked up for cells
+# the frontier reaches. Then nothing is paid for the rest of the board at all.
+
+import numpy as np
+
+from minefield import mines as field
+from minesweeperp import summarise
+from budget import Budget
+
+# Given a budget, stops when it runs out and returns what was swept so far
+def minesweeper(rho: float, s: int, d: int, summary: bool = False, seed: int = None, budget: Budget = None) -> tuple[int, np.ndarray, np.ndarray]:
+
+    # Makes the grid size odd so that it has a centre
+    d = int(d) + 1
+
+    # Centre of the grid
+    c = d // 2
+
+    # Cells are numbered row by row across a board padded with a ring of empty cells,
+    # so every cell on the board has 8 neighbours to look up
+    w = d + 2
+
+    # Whether each of a list of cells is a mine
+    if seed is None:
+        mines = eager(rho, s, d)
+    else:
+        mines = lazy(rho, s, d, seed)
+
+    # Offsets to the 8 neighbours of a cell
+    offsets = offsets_for(w)
+
+    # Initial reveal
+    frontier = np.array([(c + 1) * w + c + 1], dtype = np.int64)
+
+
+    # Propogates while there is a frontier
+    reveals, sizes, dists = sweep(frontier, mines, offsets, d, budget)
+
+
+    # Return results
+    if summary:
+        return reveals, *summarise(len(sizes), int(sizes[0]), int(sizes[-1]), int(sizes.max()))
+
+    return reveals, sizes, dists
+
+
+# Places every mine up front, then creates a starting zone with no mines
+def eager(rho: float, s: int, d: int) -> callable:
+
+    c = d // 2
+
+    mines = np.random.random((d, d)) < rho
+    mines[c - s : c + s + 1, c - s : c + s + 1] = False
+
+    padded = np.zeros((d + 2, d + 2), dtype = bool)
+    padded[1 : -1, 1 : -1] = mines
+    padded = padded.ravel()
+
+    return lambda cells: padded[cells]
+
+
+# Looks up mines from the mine field as cells are reached.
+# The starting zone and the padding have no mines
+def lazy(rho: float, s: int, d: int, seed: int) -> callable:
+
+    c = d // 2
+
+    def mines(cells: np.ndarray) -> np.ndarray:
+
+        # Offsets from the origin
+        rows, cols = np.divmod(cells, d + 2)
+        rows -= c + 1
+        cols -= c + 1
+
+        return field(seed, rho, rows, cols) & (
+            (np.maximum(np.abs(rows), np.abs(cols)) > s) &
+            (rows >= -c) & (rows < d - c) & (cols >= -c) & (cols < d - c)
+        )
+
+    return mines
+
+
+# Index offsets to the 8 neighbours of a cell in a board of width w, not including the cell itself
+def offsets_for(w: int) -> np.ndarray:
+    return np.array([dy * w + dx for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx], dtype = np.int64)
+
+
+# Frontier cells are numbered in a padded board, one cell wider on every side than the d x d board
+def sweep(frontier: np.ndarray, mines: callable, offsets: np.ndarray, d: int, budget: Budget = None) -> tuple[int, np.ndarray, np.ndarray]:
+
+    w = d + 2
+
+    # Revealed cells, and revealed cells or their neighbours.
+    # The latter is what we count as reveals, like adj(revealed) in minesweeperp
+    revealed = np.zeros(w * w, dtype = bool)
+    touched  = np.zeros(w * w, dtype = bool)
+    reveals  = 0
+
+    # Used to track alpha
+    sizes = []
+
+    # Used to track the wavefront closest to the edge of the board
+    dists = []
+
+    # Sweep until the frontier wave-front goes exctinct
+    while len(frontier) > 0:
+
+        # Stops where it got to if the budget runs out, though never before the first step
+        if budget is not None:
+            if sizes and budget.spent():
+                budget.expired = True
+                break
+            budget.take()
+
+        # Tracks the size of the frontier
+        sizes.append(len(frontier))
+
+        # Calculates the minimum distance to an edge.
+        # Padded rows and columns run from 1 to d
+        rows, cols = np.divmod(frontier, w)
+        dist_min = int(min(rows.min() - 1, d - rows.max(), cols.min() - 1, d - cols.max()))
+        dists.append(dist_min)
+
+        # Breaks early when the frontier reaches the edge
+        if dist_min == 0:
+            break
+
+        # Updates revealed cells
+        revealed[frontier] = True
+
+        # Neighbours of the frontier, each only once
+        neighbours = np.unique((frontier[:, None] + offsets).ravel())
+
+        # Counts neighbours not already counted
+        reveals += int(np.count_nonzero(~touched[neighbours]))
+        touched[neighbours] = True
+
+        # Propogates the wavefront to unrevealed zeroes.
+        # Whether a cell is a zero is only looked up when it is reached; it can't be on the
+        # padding, since the frontier is never on the edge of the board
+        frontier = neighbours[~revealed[neighbours]]
+        frontier = frontier[~mines(frontier[:, None] + offsets).any(axis = 1)]
+
+    # The frontier died out, so it has a final empty size like minesweeperp
+    else:
+        sizes.append(0)
+
+    return reveals, np.array(sizes, dtype = np.int32), np.array(dists, dtype = np.int32)
+
+
+
+# Sparse frontier vs. the others, same density.
+#       CPU                             Tensor      Bitboard    Sparse      Minesweeper (dict)
+# .. d = 100,  100 trials, rho = 0.10:  1.0652s     0.2106s     0.2673s     5.2218s
+# .. d = 1000, 20 trials,  rho = 0.10:  4.4744s     3.0424s     0.9377s     2.7376s
+# .. d = 3162, 5 trials,   rho = 0.10:  4.4869s     2.0928s     0.6516s
+# .. d = 1000, 3 trials,   rho = 0.05:  5.6017s     0.5804s     2.4514s     31.3348s
+# Below the critical density the cluster fills the board, and whole-board bit operations win again.
+
+# Lazy mines from the mine field vs. an eager d ** 2 draw.
+# The eager draw is all that's left to pay for on big boards that die early.
+#       CPU                             Eager       Lazy
+# .. d = 1000,  20 trials, rho = 0.10:  0.7159s     0.6545s
+# .. d = 3162,  5 trials,  rho = 0.10:  0.5119s     0.1327s
+# .. d = 10000, 5 trials,  rho = 0.15:  4.9636s     0.0082s
+# .. d = 1000,  3 trials,  rho = 0.05:  2.0575s     2.6075s
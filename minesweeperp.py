@@ -3,10 +3,20 @@
 # Uses the powers of tensors to do things a bit quicker.
 # However, likely due to Python being Python, it moves data between the device
 # and the CPU every iteration. This is very slow so we use the CPU instead of the GPU.
+# (The sweep now only reads back every few iterations, which should help the GPU.)
 
 import torch
 
-def minesweeper(rho: float, s: int, d: int, device: torch.device = None) -> list[float]:
+from typing import Optional
+from time import monotonic
+
+from minefield import board
+from budget import Budget
+
+# With summary, returns the mean delta_f and largest frontier in place of sizes and dists.
+# With a seed, mines come from the counter-based mine field rather than torch.rand.
+# Given a budget, stops when it runs out and returns what was swept so far.
+def minesweeper(rho: float, s: int, d: int, device: torch.device = None, summary: bool = False, seed: int = None, budget: Budget = None) -> list[float]:
 
     # Default device
     if not device:
@@ -22,7 +32,7 @@ def minesweeper(rho: float, s: int, d: int, device: torch.device = None) -> list
     c = d // 2
 
     # Tensors to track state
-    mines       = (torch.rand((d, d), device = device) < rho).to(torch.bool)
+    mines       = place(rho, (d, d), c, device, seed)
     unrevealed  = lnot((torch.zeros_like(mines, device = device)))
     frontier    = torch.zeros_like(mines, device = device)
 
@@ -37,26 +47,261 @@ def minesweeper(rho: float, s: int, d: int, device: torch.device = None) -> list
 
 
     # Propogates while there is a frontier
-    unrevealed, sizes, dists = sweep(frontier, unrevealed, zeroes, adj_kernal)
+    limit, deadline = budget.limits() if budget is not None else (-1, 0.0)
+    unrevealed, sizes, dists, (top, bottom, left, right), _, expired = sweep(frontier, unrevealed, zeroes, adj_kernal, summary = summary, limit = limit, deadline = deadline)
+    charge(budget, sizes, summary, expired)
 
-    # To calculate number of reveals, first find revealed cells
-    revealed = lnot(unrevealed)
+    # To calculate number of reveals, first find revealed cells.
+    # Only the revealed cells' bounding box and its margin can hold any
+    revealed = lnot(unrevealed[max(top - 1, 0) : bottom + 2, max(left - 1, 0) : right + 2])
 
-    # Second, include all non-zero neighbours.
+    # Second, include all non-zero neighbours (by shifts, since the window's shape varies).
     # As is, we only reveal zero-valued cells hence the extra step to
     # include neighbours which are guaranteed to be nonzeroes.
     # Even though this adj_matrix does not include the own cell, this problem is
     # by its nature contiguous so unless r = 1, it will return equivalent results.
-    revealed = adj(revealed, adj_kernal)
+    revealed = adjs(revealed.unsqueeze(0)).squeeze(0)
 
     # Counts total cells
     reveals = torch.sum(revealed).item()
 
 
     # Return results
+    if summary:
+        return reveals, *summarise(*sizes.tolist())
+
     return reveals, sizes, dists
 
 
+# Sweeps a board that starts small and doubles whenever the frontier nears its edge.
+# Most trials die within a few hundred cells, so they never pay for a sqrt(cutoff) square.
+# The trial stops on the number of reveals rather than on the size of the board.
+# dists are measured to the edge of the board at the time of each step.
+# Given a dict as state, the board and frontier are kept in it when the trial stops. Passing it back
+# with a bigger cutoff carries on where it left off, as if the trial had been run to that cutoff.
+# A trial stopped by its budget can be carried on the same way.
+def minesweeperg(rho: float, s: int, cutoff: int, d: int = 64, device: torch.device = None, summary: bool = False, seed: int = None, state: dict = None, budget: Budget = None) -> tuple[int, torch.Tensor, torch.Tensor]:
+
+    # Carries on a trial
+    if state:
+        return sweepg(cutoff, summary, **state, state = state, budget = budget)
+
+    # Default device
+    if not device:
+        device = torch.device("cpu")
+
+    # Makes the grid size odd so that it has a centre, and big enough to hold the starting zone
+    d = max(int(d), 2 * s + 4) + 1
+
+    # A kernal to quickly calculate neighbours.
+    adj_kernal = torch.tensor([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype = torch.float32, device = device).unsqueeze(0).unsqueeze(0)
+
+    # Centre of the grid
+    c = d // 2
+
+    # Tensors to track state
+    mines       = place(rho, (d, d), c, device, seed)
+    unrevealed  = lnot((torch.zeros_like(mines, device = device)))
+    frontier    = torch.zeros_like(mines, device = device)
+    seen        = torch.zeros_like(mines, device = device)
+
+    # Creates a starting zone with no mines
+    mines[c - s : c + s + 1, c - s : c + s + 1] = False
+
+    # Find cells not adjacent to a mine.
+    # The outermost ring is wrong since it can't see past the edge, so the sweep
+    # must stop 2 cells short of the edge.
+    zeroes      = lnot(adj(mines, adj_kernal))
+
+    # Initial reveal
+    frontier[c][c] = True
+
+    # Sweeps from the start
+    if state is None:
+        state = {}
+
+    state.update(rho = rho, seed = seed, mines = mines, zeroes = zeroes, unrevealed = unrevealed, frontier = frontier, seen = seen, reveals = 0, sizes = [], dists = [])
+
+    return sweepg(cutoff, summary, **state, state = state, budget = budget)
+
+
+# Sweeps a growable board until the cutoff, until the frontier dies out, or until the budget runs out.
+# The state is updated to where the sweep stopped.
+def sweepg(cutoff: int, summary: bool, rho: float, seed: int, mines: torch.Tensor, zeroes: torch.Tensor, unrevealed: torch.Tensor, frontier: torch.Tensor, seen: torch.Tensor, reveals: int, sizes: list, dists: list, state: dict = None, budget: Budget = None) -> tuple[int, torch.Tensor, torch.Tensor]:
+
+    # A kernal to quickly calculate neighbours.
+    adj_kernal = torch.tensor([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype = torch.float32, device = mines.device).unsqueeze(0).unsqueeze(0)
+
+    # Stops when infinite or when the frontier died out
+    while not (sizes and (reveals >= cutoff or died(sizes[-1], summary))):
+
+        # Propogates until the frontier dies, nears the edge, reaches the cutoff, or runs out of budget
+        limit, deadline = budget.limits() if budget is not None else (-1, 0.0)
+        unrevealed, size, dist, _, reveals, expired = sweep(frontier, unrevealed, zeroes, adj_kernal, seen, reveals, int(cutoff), 2, summary = summary, limit = limit, deadline = deadline)
+
+        sizes.append(size)
+        dists.append(dist)
+
+        # The frontier was handed back, so the trial can be carried on later
+        charge(budget, size, summary, expired)
+        if expired:
+            break
+
+        # Otherwise the frontier is near the edge; doubles the board
+        if reveals < cutoff and not died(size, summary):
+            mines, zeroes, unrevealed, frontier, seen = grow(mines, zeroes, unrevealed, frontier, seen, rho, adj_kernal, seed)
+
+    # Keeps where we got to
+    if state is not None:
+        state.update(mines = mines, zeroes = zeroes, unrevealed = unrevealed, frontier = frontier, seen = seen, reveals = reveals)
+
+
+    # Return results.
+    # The last layer may overshoot, so reveals are capped at the cutoff
+    # Sweeps stopped before their first step say nothing about the first or last frontier
+    if summary:
+        sizes = torch.stack(sizes)
+        sizes = sizes[sizes[:, 0] > 0] if bool((sizes[:, 0] > 0).any()) else sizes
+        return min(reveals, int(cutoff)), *summarise(int(sizes[:, 0].sum()), int(sizes[0, 1]), int(sizes[-1, 2]), int(sizes[:, 3].max()))
+
+    return min(reveals, int(cutoff)), torch.cat(sizes), torch.cat(dists)
+
+
+# Whether a sweep's frontier died out, rather than being stopped.
+# A sweep stopped before its first step has nothing recorded
+def died(size: torch.Tensor, summary: bool) -> bool:
+    return bool(size[0] > 0 and size[2] == 0) if summary else (len(size) > 0 and bool(size[-1] == 0))
+
+
+# Charges a sweep's steps to the budget, and notes if it ran out
+def charge(budget: Budget, size: torch.Tensor, summary: bool, expired: bool) -> None:
+    if budget is not None:
+        budget.take(int(size[0]) if summary else len(size))
+        budget.expired = budget.expired or expired
+
+
+# The monotonic clock, for compiled loops checking a budget's deadline
+@torch.jit.ignore
+def now() -> float:
+    return monotonic()
+
+
+# Doubles the board, keeping the old board at its centre.
+# New cells get fresh mines, and only the new ring (plus the old board's outermost ring,
+# which couldn't see past the old edge) has its zeroes recalculated.
+def grow(mines: torch.Tensor, zeroes: torch.Tensor, unrevealed: torch.Tensor, frontier: torch.Tensor, seen: torch.Tensor, rho: float, adj_kernal: torch.Tensor, seed: int = None) -> tuple[torch.Tensor, ...]:
+
+    # Old and new sizes, and the offset of the old board within the new
+    D = mines.size()[0]
+    G = 2 * D + 1
+    o = (G - D) // 2
+
+    # Moves each tensor into the centre of a bigger one
+    def centre(old: torch.Tensor, new: torch.Tensor) -> torch.Tensor:
+        new[o : o + D, o : o + D] = old
+        return new
+
+    mines       = centre(mines,         place(rho, (G, G), G // 2, mines.device, seed))
+    unrevealed  = centre(unrevealed,    torch.ones((G, G), dtype = torch.bool, device = mines.device))
+    frontier    = centre(frontier,      torch.zeros((G, G), dtype = torch.bool, device = mines.device))
+    seen        = centre(seen,          torch.zeros((G, G), dtype = torch.bool, device = mines.device))
+
+    # The old board's zeroes are still good, save for its outermost ring
+    new_zeroes = torch.zeros((G, G), dtype = torch.bool, device = mines.device)
+    new_zeroes[o + 1 : o + D - 1, o + 1 : o + D - 1] = zeroes[1 : -1, 1 : -1]
+
+    # Recalculates zeroes over the ring, as four strips: top, bottom, left, right
+    for r0, r1, c0, c1 in (
+        (0, o + 1, 0, G),
+        (o + D - 1, G, 0, G),
+        (o + 1, o + D - 1, 0, o + 1),
+        (o + 1, o + D - 1, o + D - 1, G)
+    ):
+
+        # Includes a 1-cell margin of mines around the strip, where there is one
+        m0, m1, n0, n1 = max(r0 - 1, 0), min(r1 + 1, G), max(c0 - 1, 0), min(c1 + 1, G)
+
+        strip = lnot(adj(mines[m0 : m1, n0 : n1], adj_kernal))
+        new_zeroes[r0 : r1, c0 : c1] = strip[r0 - m0 : r1 - m0, c0 - n0 : c1 - n0]
+
+    return mines, new_zeroes, unrevealed, frontier, seen
+
+
+# Sweeps n independent boards at once as a single (n, 1, d, d) tensor.
+# Each board drops out of the active set once its frontier dies or reaches the edge,
+# so we pay the launch and loop overhead once per batch rather than once per trial.
+# With seeds, one per board, mines come from the counter-based mine field.
+# Given a budget, shared by the whole batch, every board still going stops when it runs out.
+def minesweepers(rho: float, s: int, d: int, n: int, device: torch.device = None, summary: bool = False, seeds: list[int] = None, budget: Budget = None) -> tuple[list[int], list[torch.Tensor], list[torch.Tensor]]:
+
+    # Default device
+    if not device:
+        device = torch.device("cpu")
+
+    # Makes the grid size odd so that it has a centre
+    d = int(d) + 1
+
+    # Centre of the grid
+    c = d // 2
+
+    # Tensors to track state, one board per leading index
+    if seeds is None:
+        mines   = (torch.rand((n, d, d), device = device) < rho).to(torch.bool)
+    else:
+        mines   = torch.stack([place(rho, (d, d), c, device, seed) for seed in seeds])
+    unrevealed  = lnot((torch.zeros_like(mines, device = device)))
+    frontier    = torch.zeros_like(mines, device = device)
+
+    # Creates a starting zone with no mines on every board
+    mines[:, c - s : c + s + 1, c - s : c + s + 1] = False
+
+    # Find cells not adjacent to a mine
+    zeroes      = lnot(adjs(mines))
+
+    # Initial reveal
+    frontier[:, c, c] = True
+
+
+    # Propogates every board while any of them has a frontier
+    limit, deadline = budget.limits() if budget is not None else (-1, 0.0)
+    reveals, sizes, dists, size_lengths, dist_lengths, expired = sweeps(frontier, unrevealed, zeroes, limit, deadline)
+
+    if budget is not None:
+        budget.take(sizes.size()[0])
+        budget.expired = budget.expired or expired
+
+    # Splits the stacked per-step records back into one record per board
+    size_lengths = size_lengths.tolist()
+    dist_lengths = dist_lengths.tolist()
+
+    sizes = [sizes[ : size_lengths[b], b] for b in range(n)]
+    dists = [dists[ : dist_lengths[b], b] for b in range(n)]
+
+
+    # Return results
+    if summary:
+        summaries = [summarise(len(size), int(size[0]), int(size[-1]), int(size.max())) for size in sizes]
+        return reveals.tolist(), [summary[0] for summary in summaries], [summary[1] for summary in summaries]
+
+    return reveals.tolist(), sizes, dists
+
+
+# Places mines on a board whose origin is at (c, c).
+# From the mine field if there's a seed, otherwise fresh from torch.rand
+def place(rho: float, shape: tuple[int], c: int, device: torch.device, seed: int = None) -> torch.Tensor:
+    if seed is None:
+        return (torch.rand(shape, device = device) < rho).to(torch.bool)
+    return torch.from_numpy(board(seed, rho, -c, -c, *shape)).to(device)
+
+
+# Summarises a sweep for runs that never look at the frontiers themselves.
+# Returns the mean delta_f, the change in size between successive frontiers, and the largest frontier.
+# The mean of successive differences telescopes, so the first and last sizes are all it needs.
+# A single frontier has no delta_f, so its mean is nan, as Ragged.means gives
+def summarise(steps: int, first: int, last: int, biggest: int) -> tuple[float, int]:
+    return (last - first) / (steps - 1) if steps > 1 else float('nan'), biggest
+
+
 # Precompiles tensor operations
 # Truth be told, the precompilation is probably doing nothing in these tiny functions.
 
@@ -68,88 +313,329 @@ def adj(cells: torch.Tensor, kernel: torch.Tensor) -> torch.Tensor:
         padding=1
     ).squeeze(0).squeeze(0).to(torch.bool)
 
+# Batched adj over (n, d, d) boards.
+# Shifted ORs rather than conv2d; a batched single-channel conv2d is far slower on the CPU.
+@torch.jit.script
+def adjs(cells: torch.Tensor) -> torch.Tensor:
+
+    # Left and right neighbours
+    h = torch.zeros_like(cells)
+    h[:, :, 1 :]   = cells[:, :, : -1]
+    h[:, :, : -1]  = h[:, :, : -1] | cells[:, :, 1 :]
+
+    # Above and below neighbours of the cell and of its left and right neighbours
+    hc = h | cells
+    n = h.clone()
+    n[:, 1 :]   = n[:, 1 :] | hc[:, : -1]
+    n[:, : -1]  = n[:, : -1] | hc[:, 1 :]
+
+    return n
+
 @torch.jit.script
 def lnot(tensor: torch.Tensor) -> torch.Tensor:
     return torch.logical_not(tensor)
 
+# Optionally, seen tracks every revealed cell and its neighbours so that reveals can be counted as
+# the sweep goes, stopping once there are at least cutoff of them.
+# A positive margin stops the sweep, without recording the step, once the frontier is closer than
+# margin to the edge; the frontier is then written back so the sweep can be resumed on a bigger board.
+# Likewise the next frontier is written back when the cutoff stops it, so it can be resumed to a bigger cutoff.
+#
+# Sizes, distances and reveals are kept on the device and only read back once, at the end.
+# Whether to keep going is read back every check steps; in between, a frontier that died or
+# stopped is masked out, so the extra steps do nothing.
+#
+# With summary, no per-step record is kept. Instead sizes is [steps, first size, last size, max size]
+# and dists is [min distance]; see summarise.
+#
+# The sweep also stops after limit steps, or once the clock passes deadline (checked every check steps),
+# but always takes at least one step; a limit of -1 or deadline of 0 means none. Like the margin, this hands the frontier back.
+# Whether it stopped this way is returned last.
 @torch.jit.script
-def sweep(frontier: torch.Tensor, unrevealed: torch.Tensor, zeroes: torch.Tensor, adj_kernal: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+def sweep(frontier: torch.Tensor, unrevealed: torch.Tensor, zeroes: torch.Tensor, adj_kernal: torch.Tensor, seen: Optional[torch.Tensor] = None, reveals: int = 0, cutoff: int = 0, margin: int = 0, check: int = 8, summary: bool = False, limit: int = -1, deadline: float = 0.0) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor, list[int], int, bool]:
 
     # Grabs tensor dimension
     D = frontier.size()[0]
 
-    # Silly large tensor because script requires not-mutable data structures.
-    # And yes, this size of tensor is guaranteed to have sufficient space
     # Used to track alpha.
-    sizes = torch.zeros(int(D ** 2 / 2), dtype = torch.int32, device = frontier.device)
+    # Starts small and doubles whenever it fills, so it stays proportional to the steps taken
+    sizes = torch.zeros(32 * check, dtype = torch.int32, device = frontier.device)
     
     # Used to track the wavefront closest to the edge of the tensor
-    dists = torch.zeros(int(D ** 2 / 2), dtype = torch.int32, device = frontier.device)
+    dists = torch.zeros(32 * check, dtype = torch.int32, device = frontier.device)
+
+    # Used instead with summary
+    first   = torch.zeros((), dtype = torch.int64, device = frontier.device)
+    last    = torch.zeros((), dtype = torch.int64, device = frontier.device)
+    biggest = torch.zeros((), dtype = torch.int64, device = frontier.device)
+    closest = torch.full((), D, dtype = torch.int64, device = frontier.device)
+
+    # Distance from each row (or column) index to the nearest edge
+    edge = torch.arange(D, device = frontier.device)
+    edge = torch.minimum(edge, D - 1 - edge)
+
+    # Bounding box of the window holding the frontier, inclusive.
+    # Each step only works on the window plus a 1-cell margin, so the cost of a step
+    # scales with the cluster rather than with the whole board.
+    # The window grows by the margin each step, and shrinks back to the frontier every check steps.
+    top, bottom, left, right = 0, D - 1, 0, D - 1
+    window = frontier.clone()
+
+    # The frontier is handed back through here if the margin stops it
+    if margin > 0:
+        frontier.zero_()
+
+    # Bounding box of every revealed cell, so reveals can be counted over a window too
+    rtop, rbottom, rleft, rright = D, -1, D, -1
+
+    # In-device state.
+    # Whether the frontier is still going, the number of steps it took, and the reveals so far
+    alive   = torch.ones((), dtype = torch.bool, device = frontier.device)
+    steps   = torch.zeros((), dtype = torch.int64, device = frontier.device)
+    total   = torch.full((), reveals, dtype = torch.int64, device = frontier.device)
+
+    # Whether the cutoff stopped this step
+    full    = torch.zeros((), dtype = torch.bool, device = frontier.device)
+
+    # Whether the budget stopped the sweep
+    expired = False
 
     # Frontier step
     i = 0
 
-    # Sweep until the frontier wave-front goes exctinct
-    while frontier.any():
+    # Sweep until the frontier wave-front goes exctinct (or stops)
+    while True:
 
-        # Tracks the size of the frontier
-        sizes[i] = torch.sum(frontier).item()
+        # Out of budget; hands back the frontier still going
+        if i > 0 and ((limit >= 0 and i >= limit) or (deadline > 0 and i % check == 0 and now() >= deadline)):
+            if bool(alive):
+                expired = True
+                if margin > 0:
+                    frontier[top : bottom + 1, left : right + 1] = frontier[top : bottom + 1, left : right + 1] | window
+            break
 
-        # Tracks distance from frontier to edge
-        frontier_indices = frontier.nonzero()
+        # Every so often, checks whether to keep going and shrinks the window to the frontier
+        if i % check == 0:
 
-        # Rows and columns
-        r = frontier_indices[:, 0]
-        c = frontier_indices[:, 1]
+            if not bool(alive):
+                break
 
-        # Gets distances to each edge
-        dist_top    = r
-        dist_bottom = D - 1 - r
-        dist_left   = c
-        dist_right  = D - 1 - c
+            rows = window.any(1).nonzero()
+            cols = window.any(0).nonzero()
 
-        # Calculates the minimum distance
-        dist_min = torch.min(
-            torch.cat([
-                dist_top,
-                dist_bottom,
-                dist_left,
-                dist_right
-            ])
-        ).item()
-        dists[i] = dist_min
+            if rows.numel() > 0:
+                window = window[int(rows[0]) : int(rows[-1]) + 1, int(cols[0]) : int(cols[-1]) + 1]
 
-        # Increments step
-        i += 1
+                bottom  = top + int(rows[-1])
+                top     = top + int(rows[0])
+                right   = left + int(cols[-1])
+                left    = left + int(cols[0])
 
-        # Breaks early when the frontier reaches the edge 
-        if dist_min == 0:
-            break
 
-        # Updates revealed cells
-        unrevealed ^= frontier
+        # Size of the frontier
+        size = torch.sum(window)
+
+        # Distance from frontier to edge, using the rows and columns it occupies
+        dist = torch.minimum(
+            edge[top : bottom + 1].masked_fill(lnot(window.any(1)), D).min(),
+            edge[left : right + 1].masked_fill(lnot(window.any(0)), D).min()
+        )
+
+        # Too close to the edge to keep going; hands the frontier back to be resumed
+        if margin > 0:
+            held = alive & (dist < margin)
+            frontier[top : bottom + 1, left : right + 1] = frontier[top : bottom + 1, left : right + 1] | (window & held)
+            alive = alive & lnot(held)
+
+        # Tracks the size of the frontier, and its distance to the edge.
+        # Steps after the frontier stopped are recorded too, but trimmed at the end
+        if summary:
+            if i == 0:
+                first = size
+            last    = torch.where(alive, size, last)
+            biggest = torch.maximum(biggest, size * alive)
+            closest = torch.where(alive & (size > 0), torch.minimum(closest, dist), closest)
+
+        else:
+            if i == sizes.size()[0]:
+                sizes = torch.cat([sizes, torch.zeros_like(sizes)])
+                dists = torch.cat([dists, torch.zeros_like(dists)])
+
+            sizes[i] = size
+            dists[i] = dist
+
+        steps += alive.long()
 
+        # Stops when the frontier dies out or reaches the edge
+        alive = alive & (size > 0) & (dist > 0)
 
-        # Compute neighbours of the current frontier
-        neighbours = torch.nn.functional.conv2d(
-            frontier.unsqueeze(0).unsqueeze(0).float(),
-            adj_kernal,
-            padding=1
-        ).squeeze(0).squeeze(0).to(torch.bool)
+        # Increments step
+        i += 1
+
+        # Updates revealed cells
+        window = window & alive
+        unrevealed[top : bottom + 1, left : right + 1] = unrevealed[top : bottom + 1, left : right + 1] ^ window
+
+        rtop    = min(rtop, top)
+        rbottom = max(rbottom, bottom)
+        rleft   = min(rleft, left)
+        rright  = max(rright, right)
+
+
+        # Compute neighbours of the current frontier, over its window plus a 1-cell margin.
+        # Shifted ORs rather than conv2d; the window changes shape every step and conv2d
+        # builds (and caches) a new primitive for every shape it sees.
+        padded = torch.zeros((window.size()[0] + 2, window.size()[1] + 2), dtype = torch.bool, device = window.device)
+        padded[1 : -1, 1 : -1] = window
+        neighbours = adjs(padded.unsqueeze(0)).squeeze(0)
+
+        # The window grows by the margin, but not past the edge of the board
+        neighbours = neighbours[
+            1 if top == 0 else 0 : -1 if bottom == D - 1 else neighbours.size()[0],
+            1 if left == 0 else 0 : -1 if right == D - 1 else neighbours.size()[1]
+        ]
+        top     = max(top - 1, 0)
+        bottom  = min(bottom + 1, D - 1)
+        left    = max(left - 1, 0)
+        right   = min(right + 1, D - 1)
+
+        # Counts newly seen cells
+        if seen is not None:
+            unseen = neighbours & lnot(seen[top : bottom + 1, left : right + 1])
+            seen[top : bottom + 1, left : right + 1] = seen[top : bottom + 1, left : right + 1] | unseen
+            total += torch.sum(unseen)
+
+            # Enough reveals to call it infinite
+            if cutoff > 0:
+                full = alive & (total >= cutoff)
+                alive = alive & lnot(full)
 
 
         # Propogates the wavefront.
         # We can ignore cells with a mine since they are encloses by 
         # nonzeroes and thus unreachable anyways.
         # Equivalent to: frontier = neighbours & unrevealed & zeroes & ~mines
-        frontier = neighbours & unrevealed & zeroes
+        window = neighbours & unrevealed[top : bottom + 1, left : right + 1] & zeroes[top : bottom + 1, left : right + 1]
+
+        # Hands back the frontier the cutoff stopped, to be resumed
+        if margin > 0 and cutoff > 0:
+            frontier[top : bottom + 1, left : right + 1] = frontier[top : bottom + 1, left : right + 1] | (window & full)
+
 
+    # Summary of the steps rather than a record of them
+    if summary:
+        return unrevealed, torch.stack([steps, first, last, biggest]).cpu(), closest.unsqueeze(0).cpu(), [rtop, rbottom, rleft, rright], int(total), expired
+
+    # A frontier that died keeps its final, empty size, but no distance
+    died = sizes[(steps - 1).clamp(min = 0)] == 0
+
+    # Reads back the lengths and reveals in one go
+    counts: list[int] = torch.stack([steps, died.long(), total]).tolist()
 
     # Trims unused array
-    dists = dists[ : i]
-    sizes = sizes[ : i if dists[-1] == 0 else i + 1]
+    sizes = sizes[ : counts[0]]
+    dists = dists[ : counts[0] - counts[1]]
+
+    return unrevealed, sizes, dists, [rtop, rbottom, rleft, rright], counts[2], expired
+
+# Batched version of sweep.
+# Boards are (n, d, d); each one leaves the active set when it dies out or reaches the edge.
+# Per-step records are full length n so they can be stacked, then split by the lengths.
+# The budget's limit and deadline work as in sweep, stopping every board still going.
+@torch.jit.script
+def sweeps(frontier: torch.Tensor, unrevealed: torch.Tensor, zeroes: torch.Tensor, limit: int = -1, deadline: float = 0.0) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, bool]:
 
-    return unrevealed, sizes, dists
+    # Grabs tensor dimensions
+    N = frontier.size()[0]
+    D = frontier.size()[1]
+
+    # Distance from each row (or column) index to the nearest edge
+    edge = torch.arange(D, device = frontier.device)
+    edge = torch.minimum(edge, D - 1 - edge)
+
+    # Original indices of the boards still sweeping
+    active = torch.arange(N, device = frontier.device)
+
+    # Per-board results
+    reveals         = torch.zeros(N, dtype = torch.int64, device = frontier.device)
+    size_lengths    = torch.zeros(N, dtype = torch.int64, device = frontier.device)
+    dist_lengths    = torch.zeros(N, dtype = torch.int64, device = frontier.device)
+
+    # Per-step records of every board
+    sizes: list[torch.Tensor] = []
+    dists: list[torch.Tensor] = []
+
+    # Whether the budget stopped the sweep
+    expired = False
+
+    # Frontier step
+    i = 0
+
+    # Sweep until every board has dropped out
+    while active.numel() > 0:
+
+        # Out of budget; the boards still going stop where they are
+        if i > 0 and ((limit >= 0 and i >= limit) or (deadline > 0 and i % 8 == 0 and now() >= deadline)):
+            size_lengths[active] = i
+            dist_lengths[active] = i
+            reveals[active] = adjs(lnot(unrevealed)).sum((1, 2))
+            expired = True
+            break
+
+        # Tracks the size of each frontier
+        size = frontier.sum((1, 2)).to(torch.int32)
+
+        # Tracks distance from each frontier to the edge using the rows and columns it occupies
+        rows = frontier.any(2)
+        cols = frontier.any(1)
+
+        dist = torch.minimum(
+            edge.expand(rows.size()).masked_fill(lnot(rows), D).amin(1),
+            edge.expand(cols.size()).masked_fill(lnot(cols), D).amin(1)
+        ).to(torch.int32)
+
+        # Records this step for the active boards
+        step_sizes = torch.zeros(N, dtype = torch.int32, device = frontier.device)
+        step_dists = torch.zeros(N, dtype = torch.int32, device = frontier.device)
+        step_sizes[active] = size
+        step_dists[active] = dist
+        sizes.append(step_sizes)
+        dists.append(step_dists)
+
+        # Boards whose frontier went extinct keep the trailing zero size, like sweep
+        died = size == 0
+        size_lengths[active[died]] = i + 1
+        dist_lengths[active[died]] = i
+
+        # Boards whose frontier reached the edge
+        edged = dist == 0
+        size_lengths[active[edged]] = i + 1
+        dist_lengths[active[edged]] = i + 1
+
+        # Increments step
+        i += 1
+
+        # Counts reveals of the boards leaving, then drops them from the active set
+        done = died | edged
+        if bool(done.any()):
+            reveals[active[done]] = adjs(lnot(unrevealed[done])).sum((1, 2))
+
+            keep        = lnot(done)
+            active      = active[keep]
+            frontier    = frontier[keep]
+            unrevealed  = unrevealed[keep]
+            zeroes      = zeroes[keep]
+
+            if active.numel() == 0:
+                break
+
+        # Updates revealed cells
+        unrevealed ^= frontier
+
+        # Propogates the wavefronts
+        frontier = adjs(frontier) & unrevealed & zeroes
+
+    return reveals, torch.stack(sizes), torch.stack(dists), size_lengths, dist_lengths, expired
 
 #       END Precompiled tensoro operations
 
@@ -483,4 +969,63 @@ def sweep(frontier: torch.Tensor, unrevealed: torch.Tensor, zeroes: torch.Tensor
 # .. Mean time:           0.3996s
 # .. Median time:         0.3846s
 # .. Minimum time:        0.4273s
-# .. Maximum time:        0.3939s
\ No newline at end of file
+# .. Maximum time:        0.3939s
+
+# Batched sweep (minesweepers), 100 boards as one (100, d, d) tensor vs. 100 calls to minesweeper.
+#   d = 100
+# A batched single-channel conv2d was ~7x slower than a conv2d per board, so the batch
+# finds neighbours with shifted ORs instead.
+#       CPU         Single      Batched
+# .. rho = 0.05:    1.1559s     0.6548s
+# .. rho = 0.10:    1.0791s     0.4281s
+# .. rho = 0.15:    0.1960s     0.1542s
+
+# Cropping each step to the frontier's bounding box plus a 1-cell margin.
+# Finally, no more d ** 2 operations per iteration! Big win when the cluster is small.
+#       CPU                             Full board      Cropped
+# .. d = 100,  100 trials, rho = 0.05:  1.3886s         1.0738s
+# .. d = 100,  100 trials, rho = 0.10:  1.1099s         0.6506s
+# .. d = 1000, 20 trials,  rho = 0.10:  306.0501s       24.4594s
+# .. d = 1000, 3 trials,   rho = 0.05:  86.7196s        71.8327s
+
+# Shifted ORs instead of conv2d in the cropped sweep.
+# conv2d was building a new primitive for every window shape, and hanging on to them all
+# (memory crept up past 1.5 GB at d = 1024).
+#       CPU
+# .. d = 100,  100 trials, rho = 0.05:  1.2889s
+# .. d = 100,  100 trials, rho = 0.10:  1.0156s
+# .. d = 1000, 20 trials,  rho = 0.10:  4.3464s
+# .. d = 1000, 3 trials,   rho = 0.05:  6.1747s
+
+# Growable board (minesweeperg) vs. a fixed sqrt(cutoff) board.
+# Mostly-finite densities barely touch the board, so skipping the allocation is a huge win.
+# Near and below the critical density they take about as long, though not for the same work:
+# the growable board keeps going until the cutoff rather than stopping at the edge.
+#       CPU                                 Fixed           Growable
+# .. cutoff = 1e6, 100 trials, rho = 0.15:  7.2444s         0.3570s
+# .. cutoff = 1e7, 20 trials,  rho = 0.15:  14.6979s        0.0724s
+# .. cutoff = 1e7, 10 trials,  rho = 0.10:  9.0269s         9.4790s
+
+# No more nonzero()/item() every step; sizes, distances and reveals stay on the device and are
+# read back once at the end, and whether to stop is only read back every check steps.
+# On the CPU there's no transfer to save, so it's about even (a bit slower on small boards);
+# the point is to stop stalling the GPU every step. Best of 3:
+#       CPU                             Every step      check = 4   check = 8   check = 16
+# .. d = 100,  100 trials, rho = 0.10:  0.9749s         1.3996s     1.1912s     1.3118s
+# .. d = 1000, 10 trials,  rho = 0.10:  2.2290s         2.4678s     2.2857s     2.1828s
+# .. d = 1000, 2 trials,   rho = 0.05:  3.8718s         4.5460s     3.9552s     4.0285s
+
+# Per-layer sizes and distances are recorded in chunks that double when full (starting at 32 * check)
+# rather than preallocating d ** 2 / 2 of each; about 8 MB less per trial at d = 1000, 8 GB at d = 32768.
+# summary = True keeps only what the mean delta_f and largest frontier need (the mean telescopes to
+# (last - first) / (steps - 1)), for runs that never plot per-layer curves. Time is about even:
+#       CPU                             Full        Summary
+# .. d = 100,  100 trials, rho = 0.10:  1.3488s     1.4051s
+# .. d = 1000, 10 trials,  rho = 0.10:  2.3010s     2.5482s
+
+# Extending an experiment's cutoff from 1e5 to 1e6 by resuming each growable trial from where it stopped,
+# rather than rerunning it (10 trials, rho = 0.10, seeded so all three give the same results):
+#       CPU
+# .. Straight to 1e6:               2.830s
+# .. 1e5, then rerun to 1e6:        2.226s  (extend only, finite trials kept)
+# .. 1e5, then resumed to 1e6:      1.230s  (extend only)
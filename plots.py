@@ -21,7 +21,7 @@ def see_ms():
     cutoff = 10000
     s = 2
 
-    ms = Minesweeper(rho, cutoff, True)
+    ms = Minesweeper(rho, cutoff, visualise = True)
     ms.sweep()
 
     #_, ms = minesweeperp(rho, s, cutoff ** 0.5, visualise = True)
@@ -114,7 +114,7 @@ def frontiers():
     results = unlog(dir)
 
     graph.show_frontiers(
-        frontiers   = [frontier for frontier in results['expAlphas']],
+        frontiers   = results['expAlphas'],
         reveals     = [reveal for reveal in results['expReveals']],
         meta        = results['expMeta']
     )
@@ -134,7 +134,7 @@ def broad_frontiers():
 
     for results in results_all:
         graph.show_frontiers(
-            frontiers   = [frontier for frontier in results['expAlphas']],
+            frontiers   = results['expAlphas'],
             reveals     = [reveal for reveal in results['expReveals']],
             meta        = results['expMeta']
         )
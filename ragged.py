@@ -0,0 +1,169 @@
+# Ragged arrays, for each trial's frontier sizes.
+#
+# Rows of different lengths are packed into one flat int32 array of values, with an offsets array
+# marking where each row starts and ends: row i is values[offsets[i] : offsets[i + 1]].
+# 4 bytes a value rather than the ~28 of an int in a list, and the per-row statistics we want
+# (diffs, means, column-wise means) are whole-array numpy operations rather than Python loops.
+#
+# Saved in the same .bin/.idx layout as a logger.Store, so either is read back with unstore.
+
+import numpy as np
+
+class Ragged:
+    def __init__(self, values: np.ndarray = None, offsets: np.ndarray = None) -> None:
+
+        # The values, and where each row ends, with room to append more.
+        # Only the first offsets[n] values and n + 1 offsets are in use
+        self.buffer = np.zeros(0, dtype = np.int32) if values is None else values
+        self.ends = np.zeros(1, dtype = np.int64) if offsets is None else np.asarray(offsets, dtype = np.int64)
+        self.n = len(self.ends) - 1
+
+
+    # From a list of rows
+    @staticmethod
+    def from_lists(rows: list) -> 'Ragged':
+
+        lengths = np.array([len(row) for row in rows], dtype = np.int64)
+        values = np.concatenate([np.asarray(row, dtype = np.int32) for row in rows]) if rows else None
+
+        return Ragged(values, np.concatenate([[0], np.cumsum(lengths)]))
+
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self.ends[: self.n + 1]
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.buffer[: self.ends[self.n]]
+
+    # The length of each row
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    # Bytes held by the values and offsets in use
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.offsets.nbytes
+
+
+    def __len__(self) -> int:
+        return self.n
+
+    # A row as a view into values, or a slice of rows as a new Ragged
+    def __getitem__(self, i):
+
+        if isinstance(i, slice):
+            return self.take(np.arange(self.n)[i])
+
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(f'row {i} not in ragged array of {self.n} rows')
+
+        return self.buffer[self.ends[i] : self.ends[i + 1]]
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self[i]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, list):
+            other = Ragged.from_lists(other)
+        return isinstance(other, Ragged) and np.array_equal(self.offsets, other.offsets) and np.array_equal(self.values, other.values)
+
+    def __repr__(self) -> str:
+        return f'Ragged({self.n} rows, {len(self.values)} values)'
+
+    def tolist(self) -> list[list[int]]:
+        return [row.tolist() for row in self]
+
+
+    # Adds a row to the end.
+    # Buffers grow by doubling, so appending is amortised O(row)
+    def append(self, row) -> None:
+
+        row = np.asarray(row, dtype = np.int32)
+        end = self.ends[self.n]
+
+        if end + len(row) > len(self.buffer):
+            buffer = np.empty(max(2 * len(self.buffer), end + len(row), 1024), dtype = np.int32)
+            buffer[: end] = self.buffer[: end]
+            self.buffer = buffer
+
+        if self.n + 2 > len(self.ends):
+            ends = np.empty(max(2 * len(self.ends), 1024), dtype = np.int64)
+            ends[: self.n + 1] = self.ends[: self.n + 1]
+            self.ends = ends
+
+        self.buffer[end : end + len(row)] = row
+        self.ends[self.n + 1] = end + len(row)
+        self.n += 1
+
+    # Replaces a row, as when a trial is rerun.
+    # Everything after it is shifted, so this is O(values); rows are rarely replaced
+    def __setitem__(self, i: int, row) -> None:
+
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(f'row {i} not in ragged array of {self.n} rows')
+
+        row = np.asarray(row, dtype = np.int32)
+        start, end = self.ends[i], self.ends[i + 1]
+
+        self.buffer = np.concatenate([self.buffer[: start], row, self.values[end :]])
+        self.ends = np.concatenate([self.ends[: i + 1], self.ends[i + 1 : self.n + 1] + (len(row) - (end - start))])
+
+
+    # The rows at the given indices, in that order
+    def take(self, indices) -> 'Ragged':
+
+        indices = np.asarray(indices, dtype = np.int64)
+        starts = self.offsets[indices]
+        lengths = self.offsets[indices + 1] - starts
+
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+        # Each taken value's position in values: its row's start, plus how far along the row it is
+        positions = np.repeat(starts - offsets[: -1], lengths) + np.arange(offsets[-1])
+
+        return Ragged(self.values[positions], offsets)
+
+
+    # Successive differences within each row, as np.diff of each.
+    # A row of n values has n - 1 differences, or none if it's empty
+    def diff(self) -> 'Ragged':
+
+        values = self.values.astype(np.int64)
+        lengths = np.maximum(self.lengths() - 1, 0)
+
+        # Differences across the boundary between two rows are dropped
+        keep = np.ones(max(len(values) - 1, 0), dtype = bool)
+        keep[self.offsets[1 : -1][(self.offsets[1 : -1] > 0) & (self.offsets[1 : -1] < len(values))] - 1] = False
+
+        return Ragged(np.diff(values)[keep].astype(np.int32), np.concatenate([[0], np.cumsum(lengths)]))
+
+    # The sum of each row
+    def sums(self) -> np.ndarray:
+        prefix = np.concatenate([[0], np.cumsum(self.values, dtype = np.int64)])
+        return prefix[self.offsets[1 :]] - prefix[self.offsets[: -1]]
+
+    # The mean of each row; nan for an empty row
+    def means(self) -> np.ndarray:
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            return self.sums() / self.lengths()
+
+    # The mean of each column, over the rows long enough to have it
+    def column_means(self) -> np.ndarray:
+
+        lengths = self.lengths()
+        columns = np.arange(len(self.values)) - np.repeat(self.offsets[: -1], lengths)
+
+        return np.bincount(columns, weights = self.values) / np.bincount(columns)
+
+
+    # Writes the rows to {path}.bin and {path}.idx, laid out as a Store
+    def save(self, path: str) -> None:
+        self.values.tofile(f'{path}.bin')
+        np.stack([np.arange(self.n, dtype = np.int64), self.offsets[1 :]], axis = 1).tofile(f'{path}.idx')
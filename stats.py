@@ -0,0 +1,46 @@
+# Running statistics
+#
+# Updated a value at a time as trials finish, so an experiment's summary is there at any point,
+# in O(1), without going back over every trial's results.
+
+from math import sqrt, log2, floor, inf
+
+# Count, mean, variance (Welford's method), min and max of a stream of values
+class Welford:
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = inf
+        self.max = -inf
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    # Sample variance
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def std(self) -> float:
+        return sqrt(self.variance())
+
+
+# Counts of values in log-spaced bins, per bins to every doubling.
+# Bin b holds 2 ** (b / per) <= x < 2 ** ((b + 1) / per); anything below 1 goes in the first bin
+class Histogram:
+    def __init__(self, per: int = 4) -> None:
+        self.per = per
+        self.counts: dict[int, int] = {}
+
+    def add(self, x: float) -> None:
+        b = floor(log2(x) * self.per) if x >= 1 else 0
+        self.counts[b] = self.counts.get(b, 0) + 1
+
+    # (low, high, count) of every bin with anything in it, lowest first
+    def bins(self) -> list[tuple[float, float, int]]:
+        return [(2 ** (b / self.per), 2 ** ((b + 1) / self.per), self.counts[b]) for b in sorted(self.counts)]
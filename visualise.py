@@ -30,8 +30,7 @@ font = pygame.font.Font(None, 18)  # None for default font, 36 for size
 
 def see(minesweeper, index):
 
-    grid = minesweeper.grids[index]
-    cell = minesweeper.cells[index]
+    grid, cell = minesweeper.journal[index]
 
     if len(minesweeper.torqs) > 0:
         neighbours = minesweeper.torqs[index]
@@ -170,7 +169,7 @@ def visualise(minesweeper):
             if isinstance(minesweeper, tuple):
                 index = keys(event, len(minesweeper[1]), index)
             else:
-                index = keys(event, len(minesweeper.cells), index)
+                index = keys(event, len(minesweeper.journal), index)
 
         if isinstance(minesweeper, tuple):
             seep(minesweeper, index)